@@ -0,0 +1,282 @@
+"""
+engine benchmarks. Times the TM, TMTape, DFA and
+NFA-λ engines over inputs of growing size and
+reports throughput, peak memory and how the time
+scales with the size. Results can be saved as a
+JSON baseline and later runs compared against it,
+failing if any case got slower than the tolerance.
+
+python3 benchmarks/engines.py [-n <runs>] [-q] [-k <case>] [-j <output file>] [-c <baseline file>] [-r <tolerance>]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import tempfile
+import platform
+import tracemalloc
+
+kROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, kROOT)
+import machine
+
+kTOK_RUNS = "-n"
+kTOK_QUICK = "-q"
+kTOK_CASE = "-k"
+kTOK_JSON = "-j"
+kTOK_COMPARE = "-c"
+kTOK_TOLERANCE = "-r"
+kRUNS = 5
+kTOLERANCE = 0.25
+# measurements shorter than this are too noisy to compare
+kCOMPARE_SECONDS = 0.01
+kSEED = 812
+kCONFIGS = os.path.join(kROOT, "configs")
+# number of sizes of each case run with -q
+kQUICK_SIZES = 3
+
+
+class Case:
+    """
+    a benchmarked operation. prepare(n) sets up a
+    fresh input of size n and returns the function
+    to time and the number of units of work (steps,
+    cells, characters, states) it does
+    """
+
+    def __init__(self, name: str, unit: str, sizes: list, prepare):
+        self.name = name
+        self.unit = unit
+        self.sizes = sizes
+        self.prepare = prepare
+
+
+def tm_exec(config: str, word) -> "callable":
+    M = machine.TM(os.path.join(kCONFIGS, config))
+
+    def prepare(n: int) -> tuple:
+        w = word(n)
+        M.load(machine.TMTape(w))
+        steps = M.run(trace=machine.kTRACE_NONE).steps
+        M.load(machine.TMTape(w))
+        return M.exec, steps
+    return prepare
+
+
+def tape_write(n: int) -> tuple:
+    T = machine.TMTape("")
+    symbols = "ab" * (n // 2) + "a" * (n % 2)
+
+    def write() -> None:
+        for position, symbol in enumerate(symbols):
+            T.write(symbol, position)
+    return write, n
+
+
+def tape_read(n: int) -> tuple:
+    T = machine.TMTape("ab" * (n // 2) + "a" * (n % 2))
+
+    def read() -> None:
+        for position in range(n):
+            T.read(position)
+    return read, n
+
+
+def tape_str(n: int) -> tuple:
+    T = machine.TMTape("ab" * (n // 2) + "a" * (n % 2))
+    return T.__str__, n
+
+
+def dfa_exec(n: int) -> tuple:
+    M = machine.DFA(os.path.join(kCONFIGS, "ex_ab.dfa"))
+    M.load(machine.Tape("".join(random.Random(kSEED).choice("ab") for _ in range(n))))
+    return M.exec, n
+
+
+def nfa_config(directory: str, n: int) -> str:
+    """
+    writes an NFA-λ with 2n + 1 states accepting the
+    words that contain a random word w of length n.
+    State q0 loops on every character, q(2i) moves to
+    q(2i+1) on λ and q(2i+1) to q(2i+2) on w[i], and
+    the last state loops on every character
+    :param directory: directory to write to
+    :param n: length of w
+    :return: path of the config
+    """
+    w = "".join(random.Random(kSEED + n).choice("ab") for _ in range(n))
+    states = ["q{0}".format(i) for i in range(2 * n + 1)]
+    d_table = {state: {char: machine.kEMPTYSET for char in [machine.kLAMBA, "a", "b"]} for state in states}
+    for char in "ab":
+        d_table[states[0]][char] = [states[0]]
+        d_table[states[-1]][char] = [states[-1]]
+    for i, char in enumerate(w):
+        d_table[states[2 * i]][machine.kLAMBA] = [states[2 * i + 1]]
+        d_table[states[2 * i + 1]][char] = [states[2 * i + 2]]
+    config = {machine.kSTATES_PREFIX: states, machine.kALPHA_PREFIX: [machine.kLAMBA, "a", "b"],
+              machine.kDTABLE_PREFIX: d_table, machine.kSTART_PREFIX: states[0],
+              machine.kACCEPT_PREFIX: [states[-1]]}
+    filepath = os.path.join(directory, "contains_{0}.nfal".format(n))
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+    return filepath
+
+
+def nfa(method: str, directory: str) -> "callable":
+    def prepare(n: int) -> tuple:
+        # a fresh machine, so nothing is cached from the last run
+        N = machine.NFAlambda(nfa_config(directory, n))
+        return getattr(N, method), 2 * n + 1
+    return prepare
+
+
+def cases(directory: str) -> list:
+    return [
+        Case("TM.exec ex_812", "steps", [8, 16, 32, 64, 128],
+             tm_exec("ex_812.tm", lambda n: "ab" * (n // 2))),
+        Case("TM.exec ex_821", "steps", [64, 256, 1024, 4096],
+             tm_exec("ex_821.tm", lambda n: "ab" * (n // 2))),
+        Case("TM.exec ex_822", "steps", [12, 24, 48, 96, 192],
+             tm_exec("ex_822.tm", lambda n: "a" * (n // 3) + "b" * (n // 3) + "c" * (n // 3))),
+        Case("TMTape.write", "cells", [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7], tape_write),
+        Case("TMTape.read", "cells", [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7], tape_read),
+        Case("TMTape.__str__", "cells", [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7], tape_str),
+        Case("DFA.exec", "characters", [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], dfa_exec),
+        Case("NFAlambda.t_table", "states", [25, 50, 100, 200], nfa("t_table", directory)),
+        Case("NFAlambda.convert", "states", [25, 50, 100, 200], nfa("convert", directory)),
+    ]
+
+
+def measure(case: Case, n: int, runs: int) -> dict:
+    """
+    times a case at one size, taking the fastest of
+    the runs, then runs it once more under tracemalloc
+    for the peak memory it allocates
+    :param case: case to run
+    :param n: size of the input
+    :param runs: number of timed runs
+    :return: {"size", "work", "seconds", "rate", "peak_bytes"}
+    """
+    best = math.inf
+    for _ in range(runs):
+        function, work = case.prepare(n)
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    function, work = case.prepare(n)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"size": n, "work": work, "seconds": best,
+            "rate": work / best if best > 0 else math.inf, "peak_bytes": peak}
+
+
+def exponent(points: list, key: str) -> float:
+    """
+    least squares slope of log(key) against
+    log(size), so time ~ size ** exponent
+    :param points: measurements of one case
+    :param key: "seconds" or "peak_bytes"
+    :return: the slope, None with fewer than two points
+    """
+    points = [(math.log(p["size"]), math.log(p[key])) for p in points if p[key] > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run(runs: int, quick: bool = False, only: str = None) -> dict:
+    """
+    runs every case at every size
+    :param runs: number of timed runs per size
+    :param quick: skip the largest sizes
+    :param only: only run the cases whose name contains this
+    :return: {"environment", "cases": {name: {"unit", "points", "time_exponent", "memory_exponent"}}}
+    """
+    results = {"environment": {"python": platform.python_version(), "machine": platform.machine(),
+                               "runs": runs, "quick": quick},
+               "cases": dict()}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in cases(directory):
+            if only and only not in case.name:
+                continue
+            sizes = case.sizes[:kQUICK_SIZES] if quick else case.sizes
+            points = [measure(case, n, runs) for n in sizes]
+            results["cases"][case.name] = {"unit": case.unit, "points": points,
+                                           "time_exponent": exponent(points, "seconds"),
+                                           "memory_exponent": exponent(points, "peak_bytes")}
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    finds the measurements that are slower than the
+    baseline's for the same case and size by more than
+    the tolerance, ignoring those the baseline took
+    less than kCOMPARE_SECONDS over
+    :param results: results of this run
+    :param baseline: results of an earlier run
+    :param tolerance: allowed slowdown, 0.25 is 25%
+    :return: list of (case, size, baseline rate, rate)
+    """
+    regressions = list()
+    for name, case in results["cases"].items():
+        before = {p["size"]: p for p in baseline["cases"].get(name, {}).get("points", ())
+                  if p["seconds"] >= kCOMPARE_SECONDS}
+        for point in case["points"]:
+            if point["size"] in before and point["rate"] * (1 + tolerance) < before[point["size"]]["rate"]:
+                regressions.append((name, point["size"], before[point["size"]]["rate"], point["rate"]))
+    return regressions
+
+
+def report(results: dict) -> None:
+    for name, case in results["cases"].items():
+        print("{0}  (time ~ n^{1}, memory ~ n^{2})".format(name, *(
+            "?" if case[key] is None else "{0:.2f}".format(case[key])
+            for key in ["time_exponent", "memory_exponent"])))
+        for point in case["points"]:
+            print("    n={0:<10} {1:>12} {2:<10} {3:>10.4f} s {4:>14,.0f} {2}/s {5:>12,} B peak".format(
+                point["size"], point["work"], case["unit"], point["seconds"], point["rate"],
+                point["peak_bytes"]))
+
+
+if __name__ == "__main__":
+    runs = kRUNS
+    quick = False
+    only = None
+    output = None
+    baseline = None
+    tolerance = kTOLERANCE
+    for i in range(len(sys.argv)):
+        if sys.argv[i] == kTOK_RUNS:
+            runs = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_QUICK:
+            quick = True
+        if sys.argv[i] == kTOK_CASE:
+            only = sys.argv[i+1]
+        if sys.argv[i] == kTOK_JSON:
+            output = sys.argv[i+1]
+        if sys.argv[i] == kTOK_COMPARE:
+            baseline = sys.argv[i+1]
+        if sys.argv[i] == kTOK_TOLERANCE:
+            tolerance = float(sys.argv[i+1])
+    results = run(runs, quick, only)
+    report(results)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    regressions = list()
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), tolerance)
+        for name, n, before, after in regressions:
+            print("SLOWER  {0} n={1}: {2:,.0f} -> {3:,.0f} per second".format(name, n, before, after))
+    exit(1 if regressions else 0)
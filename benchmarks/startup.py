@@ -0,0 +1,88 @@
+"""
+startup benchmark. Times fresh interpreters that
+import the machine package (and the engines one at
+a time) against a bare interpreter, and fails if
+any of them goes over its import-time budget.
+
+python3 benchmarks/startup.py [-n <runs>] [-j <output file>]
+"""
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+kTOK_RUNS = "-n"
+kTOK_JSON = "-j"
+kRUNS = 20
+kROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+kBASELINE = "pass"
+# milliseconds on top of a bare interpreter
+kBUDGETS = {
+    "import machine": 5,
+    "import machine; machine.TM": 30,
+    "import machine; machine.DFA": 25,
+    "import machine; machine.NFAlambda": 25,
+}
+
+
+def environment() -> dict:
+    """
+    the environment for the timed interpreters, with
+    bytecode caching on as it is for normal use
+    :return: environment variables
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def time_command(code: str, runs: int) -> float:
+    """
+    runs python -c code in a fresh interpreter
+    a number of times
+    :param code: python source to run
+    :param runs: number of runs
+    :return: median wall time in milliseconds
+    """
+    times = list()
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=kROOT, env=environment(), check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run(runs: int) -> dict:
+    """
+    times every budgeted command
+    :param runs: number of runs per command
+    :return: {command: {"ms", "budget", "ok"}}, times net of the baseline
+    """
+    # warm the bytecode caches so the first command isn't charged for compiling
+    subprocess.run([sys.executable, "-c", "; ".join(kBUDGETS)], cwd=kROOT, env=environment(), check=True)
+    baseline = time_command(kBASELINE, runs)
+    results = dict()
+    for code, budget in kBUDGETS.items():
+        ms = time_command(code, runs) - baseline
+        results[code] = {"ms": round(ms, 2), "budget": budget, "ok": ms <= budget}
+    return results
+
+
+if __name__ == "__main__":
+    runs = kRUNS
+    output = None
+    for i in range(len(sys.argv)):
+        if sys.argv[i] == kTOK_RUNS:
+            runs = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_JSON:
+            output = sys.argv[i+1]
+    results = run(runs)
+    for code, result in results.items():
+        print("{0:<40} {1:>8.2f} ms  (budget {2} ms){3}".format(
+            code, result["ms"], result["budget"], "" if result["ok"] else "  OVER BUDGET"))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    exit(0 if all(result["ok"] for result in results.values()) else 1)
@@ -0,0 +1,39 @@
+{
+    "Accept": [
+        "q4"
+    ],
+    "Alphabet": [
+        "a",
+        "b"
+    ],
+    "D-Table": {
+        "q0": {
+            "Б, Б": "q1, (Б, Б), (→, →)"
+        },
+        "q1": {
+            "a, Б": "q1, (a, a), (→, →)",
+            "b, Б": "q2, (b, Б), (→, ←)"
+        },
+        "q2": {
+            "b, a": "q2, (b, a), (→, ←)",
+            "Б, a": "q3, (Б, a), (→, ←)"
+        },
+        "q3": {
+            "Б, Б": "q4, (Б, Б), (→, →)"
+        }
+    },
+    "Start": "q0",
+    "States": [
+        "q0",
+        "q1",
+        "q2",
+        "q3",
+        "q4"
+    ],
+    "Tapes": 2,
+    "TapeAlphabet": [
+        "a",
+        "b",
+        "Б"
+    ]
+}
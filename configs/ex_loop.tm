@@ -0,0 +1,29 @@
+{
+    "Accept": [
+    ],
+    "Alphabet": [
+        "a"
+    ],
+	"TapeAlphabet": [
+	    "Б",
+        "a"
+    ],
+    "D-Table": {
+        "q0": {
+            "Б": "q1, Б, →"
+        },
+        "q1": {
+            "a": "q0, a, ←",
+            "Б": "q2, Б, →"
+        },
+        "q2": {
+            "Б": "q2, Б, →"
+        }
+    },
+    "Start": "q0",
+    "States": [
+        "q0",
+        "q1",
+        "q2"
+    ]
+}
@@ -0,0 +1,32 @@
+{
+    "Accept": [
+        "q3"
+    ],
+    "Alphabet": [
+        "1"
+    ],
+    "D-Table": {
+        "q0": {
+            "Б": "q1, Б, →"
+        },
+        "q1": {
+            "1": "q1, 1, →",
+            "Б": "q2, 1, ↓"
+        },
+        "q2": {
+            "1": "q2, 1, ←",
+            "Б": "q3, Б, ↓"
+        }
+    },
+    "Start": "q0",
+    "States": [
+        "q0",
+        "q1",
+        "q2",
+        "q3"
+    ],
+    "TapeAlphabet": [
+        "1",
+        "Б"
+    ]
+}
@@ -0,0 +1,12 @@
+import os
+from machine import TM, TMTape
+
+if __name__ == "__main__":
+    filepath = os.path.join(os.path.dirname(__file__), "..", "configs", "ex_821.tm")
+    myMT = TM(filepath)
+    myTape = TMTape("aa")
+    myMT.load(myTape)
+    # print(myMT.get_c())
+    for config in myMT.exec():
+        print(config)
+        # print(myMT.dumps())
@@ -0,0 +1,79 @@
+import sys
+from .constants import *
+
+
+class Machine:
+    def __init__(self, filepath=None):
+        self.current_state = None
+        self.current_position = 0
+        self.loaded_tape = None
+        try:
+            if filepath:
+                self.config(filepath)
+        except (InvalidConfigBlock, MissingConfigBlock, FileNotFoundError) as e:
+            print(type(e), e, sys.stderr)
+
+    def config(self, filepath):
+        """
+        uses a given file to configure the
+        machine
+
+        :param filepath:
+        :return:
+        """
+        pass
+
+    def export(self, filepath):
+        pass
+
+    def dumps(self) -> str:
+        pass
+
+    def exec(self):
+        """
+        performs a execution of the machine
+        with the currently loaded tape
+
+        :return:
+        """
+        pass
+
+    def load(self, tape):
+        """
+        loads a tape in the machine
+
+        :param Tape tape: tape to load into machine
+        """
+        self.loaded_tape = tape
+
+
+class BadTMTransition(Exception):
+    pass
+
+
+class TMTransitionUndefined(Exception):
+    pass
+
+
+class TMLimitExceeded(Exception):
+    pass
+
+
+class TMLoopDetected(Exception):
+    pass
+
+
+class InvalidSnapshot(Exception):
+    pass
+
+
+class InvalidCharacterInTape(Exception):
+    pass
+
+
+class MissingConfigBlock(Exception):
+    pass
+
+
+class InvalidConfigBlock(Exception):
+    pass
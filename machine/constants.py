@@ -0,0 +1,43 @@
+kSTATES_PREFIX = "States"
+kALPHA_PREFIX = "Alphabet"
+kTAPEALPHA_PREFIX = "TapeAlphabet"
+kDTABLE_PREFIX = "D-Table"
+kTTABLE_PREFIX = "T-Table"
+kSTART_PREFIX = "Start"
+kACCEPT_PREFIX = "Accept"
+kTAPES_PREFIX = "Tapes"
+kEXEC_OUTPUT = "output"
+kEXEC_ACCEPT = "accepted"
+kEXEC_TAPE = "tape"
+kLAMBA = ""
+kEMPTYSET = "∅"
+kBLANK = "Б"
+kLEFT = "←"
+kRIGHT = "→"
+kSTATIONARY = "↓"
+kDELTAS = {kLEFT: -1, kSTATIONARY: 0, kRIGHT: 1}
+kVERDICT_ACCEPTED = "Accepted"
+kVERDICT_REJECTED = "Rejected"
+kVERDICT_HALTED = "Halted"
+kVERDICT_EXHAUSTED = "Exhausted"
+kVERDICT_LOOPING = "Looping"
+kVERDICT_INVALID = "Invalid"
+kTRACE_NONE = 0
+kTRACE_FULL = 1
+kRUN_CHUNK = 1 << 16
+kBATCH_CHUNK = 64
+kMACRO_BLOCK = 4
+kLAZY_DFA_SIZE = 4096
+kNTM_MAX_CONFIGS = 1 << 20
+kTAPE_SEPARATOR = " | "
+kCOMPILED_EXT = ".tmc"
+kCOMPILED_MAGIC = b"TMC\x01"
+kSNAPSHOT_MAGIC = b"TMS\x01"
+kCHECKPOINT_SECONDS = 60
+kTRACE_MAGIC = b"TMT\x01"
+kTRACE_KEYFRAME = 1 << 16
+kSERVER_HOST = "127.0.0.1"
+kSERVER_PORT = 8812
+kSERVER_SLICE = 1 << 14
+kSERVER_OFFLOAD_STEPS = 1 << 20
+kSERVER_LINE_LIMIT = 1 << 24
@@ -0,0 +1,279 @@
+import json
+import copy
+import collections
+from .constants import *
+from .base import Machine, InvalidCharacterInTape, MissingConfigBlock, InvalidConfigBlock
+
+
+class DFA(Machine):
+    def __init__(self, filepath=None):
+        self.states = None
+        self.alpha = None
+        self.d_table = None
+        self.start = None
+        self.accept = None
+        self.c_rows = None
+        super().__init__(filepath)
+
+    def config(self, filepath):
+
+        file_exists = False
+
+        # open filepath
+        with open(filepath, encoding='utf-8') as f:
+            file_exists = True
+            configuration = json.load(f)
+
+            # validate config
+            config_valid = True
+
+            # check blocks
+            needed_configs = {kSTATES_PREFIX, kALPHA_PREFIX, \
+                              kDTABLE_PREFIX, kSTART_PREFIX, \
+                              kACCEPT_PREFIX}
+            all_blocks_present = needed_configs == set(configuration.keys())
+            if not all_blocks_present:
+                raise MissingConfigBlock(set(configuration.keys()).difference(needed_configs))
+
+            # checking configs
+            invalid_config_blocks = list()
+
+            # is states a set
+            states_are_set = (len(configuration[kSTATES_PREFIX]) == len(set(configuration[kSTATES_PREFIX])))
+            config_valid &= states_are_set
+            if not states_are_set:
+                invalid_config_blocks.append(kSTATES_PREFIX)
+            pass
+
+            # is alpha a set
+            alpha_is_set = (len(configuration[kALPHA_PREFIX]) == len(set(configuration[kALPHA_PREFIX])))
+            config_valid &= alpha_is_set
+            if not alpha_is_set:
+                invalid_config_blocks.append(kALPHA_PREFIX)
+            pass
+
+            # is d-table defined for all states/symbols
+            # for every state
+            # for evert alpha
+            # state is defined
+            states = set(configuration[kSTATES_PREFIX])
+            alpha = set(configuration[kALPHA_PREFIX])
+            d_table = configuration[kDTABLE_PREFIX]
+            missing_dtable_elements = list()
+            d_table_valid = True
+            try:
+                for this_state in states:
+                    for this_alpha in alpha:
+                        if not (d_table[this_state][this_alpha] in states):
+                            missing_dtable_elements.append((this_state, this_alpha, d_table[this_state][this_alpha]))
+                            d_table_valid = False
+            except KeyError as e:
+                d_table_valid = False
+                missing_dtable_elements.append(e)
+            if not d_table_valid:
+                invalid_config_blocks.append((kDTABLE_PREFIX, missing_dtable_elements))
+            config_valid &= d_table_valid
+            pass
+
+            # is accepting subset of states
+            accept = set(configuration[kACCEPT_PREFIX])
+            accept_is_subset = accept.issubset(states)
+            config_valid &= accept_is_subset
+            if not accept_is_subset:
+                invalid_config_blocks.append(kACCEPT_PREFIX)
+            pass
+
+            # is starting state element of states
+            start = configuration[kSTART_PREFIX]
+            start_in_states = start in states
+            config_valid &= start_in_states
+            if not start_in_states:
+                invalid_config_blocks.append(kSTART_PREFIX)
+            pass
+
+            if not config_valid:
+                raise InvalidConfigBlock(invalid_config_blocks)
+            pass
+
+            # configure DFA
+
+            # set states
+            self.states = copy.deepcopy(states)
+
+            # set alpha
+            self.alpha = copy.deepcopy(alpha)
+
+            # set d-table
+            self.d_table = copy.deepcopy(d_table)
+
+            # set starting-state
+            self.start = copy.deepcopy(start)
+
+            # set accepting-states
+            self.accept = copy.deepcopy(accept)
+        if not file_exists:
+            raise FileNotFoundError
+        self.compile()
+
+    def compile(self) -> None:
+        """
+        compiles the d-table into an integer coded
+        form for use by run(). c_rows holds, for each
+        state number, a dict from character to next
+        state number; c_table holds the same rows as
+        lists indexed by symbol number, and c_bytes
+        translates single byte characters to symbol
+        numbers (anything else to an invalid number)
+        :return:
+        """
+        self.state_list = sorted(self.states)
+        self.state_index = {state: i for i, state in enumerate(self.state_list)}
+        self.symbol_list = sorted(self.alpha)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbol_list)}
+        self.c_rows = [{char: self.state_index[self.d_table[state][char]] for char in self.symbol_list}
+                       for state in self.state_list]
+        self.c_table = [[row[char] for char in self.symbol_list] for row in self.c_rows]
+        self.c_accept = [state in self.accept for state in self.state_list]
+        self.c_bytes = None
+        if len(self.symbol_list) < 256:
+            translation = bytearray([len(self.symbol_list)] * 256)
+            for char, i in self.symbol_index.items():
+                if len(char) == 1 and ord(char) < 256:
+                    translation[ord(char)] = i
+            self.c_bytes = bytes(translation)
+
+    def minimize(self) -> dict:
+        """
+        minimizes the DFA in place. States that can't
+        be reached from the start state are dropped,
+        then equivalent states are merged by Hopcroft's
+        partition refinement. Each merged state keeps
+        the smallest name among its members
+        :return: report of the number of states before and
+        after, and how many were unreachable or merged
+        """
+        before = len(self.states)
+        # reachable states
+        reachable = {self.start}
+        stack = [self.start]
+        while stack:
+            state = stack.pop()
+            for char in self.alpha:
+                next_state = self.d_table[state][char]
+                if next_state not in reachable:
+                    reachable.add(next_state)
+                    stack.append(next_state)
+
+        # predecessors of each state on each character
+        inverse = {char: collections.defaultdict(list) for char in self.alpha}
+        for state in reachable:
+            for char in self.alpha:
+                inverse[char][self.d_table[state][char]].append(state)
+
+        accept = self.accept.intersection(reachable)
+        blocks = [set(x) for x in [accept, reachable.difference(accept)] if x]
+        block_of = {state: i for i, block in enumerate(blocks) for state in block}
+        work = {min(range(len(blocks)), key=lambda i: len(blocks[i]))} if len(blocks) == 2 else set()
+        while work:
+            splitter = set(blocks[work.pop()])
+            for char in self.alpha:
+                touched = collections.defaultdict(list)
+                for state in splitter:
+                    for predecessor in inverse[char][state]:
+                        touched[block_of[predecessor]].append(predecessor)
+                for i, states in touched.items():
+                    if len(states) == len(blocks[i]):
+                        continue
+                    new_block = set(states)
+                    blocks[i].difference_update(new_block)
+                    blocks.append(new_block)
+                    for state in new_block:
+                        block_of[state] = len(blocks) - 1
+                    if i in work or len(new_block) <= len(blocks[i]):
+                        work.add(len(blocks) - 1)
+                    else:
+                        work.add(i)
+
+        names = [min(block) for block in blocks]
+        d_table = dict()
+        for i, block in enumerate(blocks):
+            member = next(iter(block))
+            d_table[names[i]] = {char: names[block_of[self.d_table[member][char]]] for char in self.alpha}
+        self.states = set(names)
+        self.d_table = d_table
+        self.start = names[block_of[self.start]]
+        self.accept = {names[block_of[state]] for state in accept}
+        self.compile()
+        return {"before": before, "unreachable": before - len(reachable),
+                "merged": len(reachable) - len(self.states), "after": len(self.states)}
+
+    def run(self, word=None) -> bool:
+        """
+        runs the DFA over a word using the compiled
+        d-table without keeping a trace
+        :param word: str or bytes to run, defaults to the loaded tape
+        :return: True if the word is accepted
+        """
+        if self.c_rows is None:
+            self.compile()
+        if word is None:
+            word = str(self.loaded_tape)
+        state = self.state_index[self.start]
+        try:
+            if isinstance(word, (bytes, bytearray)) and self.c_bytes is not None:
+                table = self.c_table
+                for code in word.translate(self.c_bytes):
+                    state = table[state][code]
+            else:
+                if isinstance(word, (bytes, bytearray)):
+                    word = word.decode("latin-1")
+                rows = self.c_rows
+                for char in word:
+                    state = rows[state][char]
+        except (KeyError, IndexError):
+            invalid = set(word.decode("latin-1") if isinstance(word, (bytes, bytearray)) else word)
+            raise InvalidCharacterInTape(invalid.difference(self.alpha))
+        return self.c_accept[state]
+
+    def __config(self) -> dict:
+        config = {}
+        config[kSTATES_PREFIX] = list(self.states)
+        config[kALPHA_PREFIX] = list(self.alpha)
+        config[kDTABLE_PREFIX] = self.d_table
+        config[kSTART_PREFIX] = self.start
+        config[kACCEPT_PREFIX] = list(self.accept)
+        return config
+
+    def export(self, filepath):
+        # generate a config
+        with open(filepath, "w+", encoding='utf-8') as f:
+            json.dump(self.__config(), f, sort_keys=True, indent=4, ensure_ascii=False)
+        pass
+
+    def dumps(self) -> str:
+        return json.dumps(self.__config(), sort_keys=True, indent=4, ensure_ascii=False)
+
+    def exec(self) -> dict:
+        self.current_state = self.start
+        self.current_position = 0
+        ret = dict()
+        output = list()
+        try:
+            for char in str(self.loaded_tape):
+                new_state = self.d_table[self.current_state][char]
+                output.append("state: {0}, character: {1}, new state: {2}\n".format(self.current_state, char,
+                                                                                   new_state))
+                self.current_state = new_state
+                self.current_position += 1
+        except KeyError as e:
+            raise InvalidCharacterInTape(*e.args)
+        if self.current_state in self.accept:
+            output.append("accepted {1}, state: {0}\n".format(self.current_state, str(self.loaded_tape)))
+            ret[kEXEC_ACCEPT] = True
+        else:
+            output.append("rejected {1}, state: {0}\n".format(self.current_state, str(self.loaded_tape)))
+            ret[kEXEC_ACCEPT] = False
+
+        ret[kEXEC_OUTPUT] = "".join(output)
+        ret[kEXEC_TAPE] = str(self.loaded_tape)
+        return ret
@@ -0,0 +1,34 @@
+import json
+import os
+import collections
+from .constants import *
+
+
+def generateConfigDFA():
+    config = dict()
+    config[kSTATES_PREFIX] = list(set("AB"))
+    config[kALPHA_PREFIX] = list(set("ab"))
+    config[kDTABLE_PREFIX] = collections.defaultdict(dict)
+    for this_state in config[kSTATES_PREFIX]:
+        for this_alpha in config[kALPHA_PREFIX]:
+            config[kDTABLE_PREFIX][this_state][this_alpha] = this_state
+    config[kSTART_PREFIX] = "A"
+    config[kACCEPT_PREFIX] = list(set("A"))
+    filepath = os.path.join(os.path.expanduser("~"), "Desktop", "test_config.dfa")
+    with open(filepath, "w+", encoding='utf-8') as f:
+        json.dump(config, f, sort_keys=True, indent=4, ensure_ascii=False)
+
+
+def generateConfigNFAlamba():
+    config = dict()
+    config[kSTATES_PREFIX] = list(set("AB"))
+    config[kALPHA_PREFIX] = [kLAMBA, 'a', 'b']
+    config[kDTABLE_PREFIX] = collections.defaultdict(dict)
+    for this_state in config[kSTATES_PREFIX]:
+        for this_alpha in config[kALPHA_PREFIX]:
+            config[kDTABLE_PREFIX][this_state][this_alpha] = this_state
+    config[kSTART_PREFIX] = "A"
+    config[kACCEPT_PREFIX] = list(set("A"))
+    filepath = os.path.join(os.path.expanduser("~"), "Desktop", "test_config.nfal")
+    with open(filepath, "w+", encoding='utf-8') as f:
+        json.dump(config, f, sort_keys=True, indent=4, ensure_ascii=False)
@@ -0,0 +1,390 @@
+import json
+import copy
+import collections
+from .constants import *
+from .base import Machine, InvalidCharacterInTape, MissingConfigBlock, InvalidConfigBlock
+from .dfa import DFA
+
+
+class NFAlambda(Machine):
+    def __init__(self, filepath=None):
+        self.states: set = None
+        self.alpha: set = None
+        self.d_table: dict = None
+        self.start: str = None
+        self.accept: set = None
+        self.lambda_states: list = None
+        self.closure_cache: dict = None
+        self.move_cache: dict = None
+        self.lazy_dfa = collections.OrderedDict()
+        super().__init__(filepath)
+
+    def config(self, filepath):
+        self.lambda_states = None
+        self.closure_cache = None
+        self.move_cache = None
+        self.lazy_dfa = collections.OrderedDict()
+        with open(filepath, encoding='utf-8') as f:
+            configuration = json.load(f)
+
+            # check needed blocks
+            needed_configs = {kSTATES_PREFIX, kALPHA_PREFIX, \
+                              kDTABLE_PREFIX, kSTART_PREFIX, \
+                              kACCEPT_PREFIX}
+            all_blocks_present = needed_configs == set(configuration.keys())
+            if not all_blocks_present:
+                raise MissingConfigBlock(set(configuration.keys()).difference(needed_configs))
+
+            # validate blocks
+            self.states = set(configuration[kSTATES_PREFIX])
+            if self.states == set():
+                raise InvalidConfigBlock(kSTATES_PREFIX, self.states)
+            self.alpha = set(configuration[kALPHA_PREFIX])
+            if self.alpha == set():
+                raise InvalidConfigBlock(kALPHA_PREFIX, self.alpha)
+            self.d_table = configuration[kDTABLE_PREFIX]
+            for this_state in self.d_table.keys():
+                for this_char in self.d_table[this_state].keys():
+                    if self.d_table[this_state][this_char] == kEMPTYSET:
+                        self.d_table[this_state][this_char] = set()
+                    else:
+                        self.d_table[this_state][this_char] = set(self.d_table[this_state][this_char])
+                        if not self.d_table[this_state][this_char].issubset(self.states):
+                            raise InvalidConfigBlock(kDTABLE_PREFIX, self.d_table[this_state][this_char])
+            self.start = configuration[kSTART_PREFIX]
+            if not self.start in self.states:
+                raise InvalidConfigBlock(kSTART_PREFIX, self.start)
+            self.accept = set(configuration[kACCEPT_PREFIX])
+            if not self.accept.issubset(self.states):
+                raise InvalidConfigBlock(kACCEPT_PREFIX, self.accept)
+
+    def __config(self) -> dict:
+        config = {}
+        config[kSTATES_PREFIX] = list(self.states)
+        config[kALPHA_PREFIX] = list(self.alpha)
+        config[kDTABLE_PREFIX] = collections.defaultdict(dict)
+        for this_state in self.states:
+            for this_char in self.alpha:
+                output_list = list(self.d_table[this_state][this_char])
+                if len(output_list) == 0:
+                    output_list = kEMPTYSET
+                config[kDTABLE_PREFIX][this_state][this_char] = output_list
+        config[kSTART_PREFIX] = self.start
+        config[kACCEPT_PREFIX] = list(self.accept)
+        return config
+
+    def export(self, filepath):
+        with open(filepath, "w+", encoding='utf-8') as f:
+            json.dump(self.__config(), f, sort_keys=True, indent=4, ensure_ascii=False)
+
+    def dumps(self) -> str:
+        return json.dumps(self.__config(), sort_keys=True, indent=4, ensure_ascii=False)
+
+    def exec(self) -> dict:
+        """
+        runs the NFA-λ over the loaded tape, tracking
+        the set of active states, and logs each step
+        :return: dict with the accepted flag, log and tape
+        """
+        ret = dict()
+        output = list()
+        mask = self.__closure_mask([self.start])
+        for char in str(self.loaded_tape):
+            new_mask = self.__lazy_step(mask, char)
+            output.append("states: {0}, character: {1}, new states: {2}\n".format(
+                self.__mask_label(mask), char, self.__mask_label(new_mask)))
+            mask = new_mask
+        ret[kEXEC_ACCEPT] = self.__accepts(mask)
+        output.append("{0} {1}, states: {2}\n".format("accepted" if ret[kEXEC_ACCEPT] else "rejected",
+                                                     str(self.loaded_tape), self.__mask_label(mask)))
+        ret[kEXEC_OUTPUT] = "".join(output)
+        ret[kEXEC_TAPE] = str(self.loaded_tape)
+        return ret
+
+    def run(self, word: str = None) -> bool:
+        """
+        runs the NFA-λ over a word without converting
+        it. The active states are a bitmask that is
+        closed under λ after every character. Steps
+        from a set of states are cached as they are
+        met, like a lazy DFA, keeping the most recently
+        used kLAZY_DFA_SIZE of them
+        :param word: word to run, defaults to the loaded tape
+        :return: True if the word is accepted
+        """
+        if word is None:
+            word = str(self.loaded_tape)
+        mask = self.__closure_mask([self.start])
+        for char in word:
+            mask = self.__lazy_step(mask, char)
+        return self.__accepts(mask)
+
+    def __lazy_step(self, mask: int, char: str) -> int:
+        cache = self.lazy_dfa
+        key = (mask, char)
+        try:
+            next_mask = cache[key]
+            cache.move_to_end(key)
+        except KeyError:
+            if self.move_cache is None:
+                self.move_cache = self.__moves(sorted(self.alpha.difference({kLAMBA})))
+            try:
+                next_mask = self.__step(mask, self.move_cache[char])
+            except KeyError:
+                raise InvalidCharacterInTape({char})
+            cache[key] = next_mask
+            if len(cache) > kLAZY_DFA_SIZE:
+                cache.popitem(last=False)
+        return next_mask
+
+    def __accepts(self, mask: int) -> bool:
+        return not self.accept.isdisjoint(self.__mask_states(mask))
+
+    def __mask_label(self, mask: int) -> str:
+        return "".join(sorted(self.__mask_states(mask))) or kEMPTYSET
+
+    def lambda_masks(self) -> dict:
+        """
+        λ-closure of every state as a bitmask, where
+        bit i stands for lambda_states[i]. Worked out
+        once over the strongly connected components of
+        the λ-transitions, successors first, and cached
+        until config() runs again
+        :return: dict of state to closure mask
+        """
+        if self.closure_cache is not None:
+            return self.closure_cache
+        self.lambda_states = sorted(self.states)
+        bit = {state: 1 << i for i, state in enumerate(self.lambda_states)}
+
+        def successors(state: str):
+            return self.d_table.get(state, {}).get(kLAMBA, ())
+
+        # iterative Tarjan, which finishes each component after all
+        # the components it can reach
+        closures = dict()
+        order = dict()
+        low = dict()
+        stack = list()
+        on_stack = set()
+        for root in self.lambda_states:
+            if root in order:
+                continue
+            order[root] = low[root] = len(order)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors(root)))]
+            while work:
+                state, children = work[-1]
+                for child in children:
+                    if child not in order:
+                        order[child] = low[child] = len(order)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors(child))))
+                        break
+                    elif child in on_stack:
+                        low[state] = min(low[state], order[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[state])
+                    if low[state] == order[state]:
+                        component = list()
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == state:
+                                break
+                        mask = 0
+                        for member in component:
+                            mask |= bit[member]
+                            for child in successors(member):
+                                mask |= closures.get(child, 0)
+                        for member in component:
+                            closures[member] = mask
+        self.closure_cache = closures
+        return closures
+
+    def __mask_states(self, mask: int) -> set:
+        return {self.lambda_states[i] for i in range(mask.bit_length()) if mask >> i & 1}
+
+    def __closure_mask(self, states) -> int:
+        closures = self.lambda_masks()
+        mask = 0
+        for state in states:
+            mask |= closures[state]
+        return mask
+
+    def lambda_closure2(self, state) -> set:
+        """
+        lambda closure of a state or set of states,
+        from the cached closure masks
+        :param state:
+        :return:
+        """
+        if type(state) == str:
+            state = {state}
+        return self.__mask_states(self.__closure_mask(state))
+
+    def lambda_closure(self, state) -> set:
+        """
+        lambda closure of a state or set of states
+        :param state:
+        :return:
+        """
+        return self.lambda_closure2(state)
+
+    def __moves(self, alpha: list) -> dict:
+        """
+        for each character, the closed set of states
+        reached from each state on that character, as
+        a list of masks in lambda_states order
+        """
+        self.lambda_masks()
+        return {char: [self.__closure_mask(self.d_table.get(state, {}).get(char, ()))
+                       for state in self.lambda_states] for char in alpha}
+
+    @staticmethod
+    def __step(mask: int, move: list) -> int:
+        """
+        union of the moves of every state in a mask
+        """
+        result = 0
+        while mask:
+            low = mask & -mask
+            result |= move[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+    def t_table(self) -> dict:
+        t_table = collections.defaultdict(dict)
+        reduced_alpha = copy.deepcopy(self.alpha)
+        reduced_alpha.remove(kLAMBA)
+        closures = self.lambda_masks()
+        moves = self.__moves(sorted(reduced_alpha))
+        for this_state in self.states:
+            for this_char in reduced_alpha:
+                t_table[this_state][this_char] = self.__mask_states(self.__step(closures[this_state],
+                                                                                moves[this_char]))
+
+        return t_table
+
+    def dumps_ttable(self) -> str:
+        t_table = self.t_table()
+        for this_state in t_table.keys():
+            for this_key in t_table[this_state].keys():
+                item = t_table[this_state][this_key]
+                if type(item) == set:
+                    t_table[this_state][this_key] = list(item)
+        return json.dumps(t_table, sort_keys=True, indent=4, ensure_ascii=False)
+
+    def convert(self, minimize: bool = False) -> DFA:
+        """
+        converts the NFA-λ to an equivalent DFA by
+        the subset construction. Subsets of states are
+        bitmasks, looked up in a dict to find the DFA
+        state they already became
+        :param minimize: minimize the DFA afterwards, the report
+        from DFA.minimize() is kept as minimize_report
+        :return: the DFA
+        """
+        # subsets of states are bitmasks over lambda_states
+        alpha = sorted(self.alpha.difference({kLAMBA}))
+        moves = self.__moves(alpha)
+        state_list = self.lambda_states
+        accept_mask = 0
+        for i, state in enumerate(state_list):
+            if state in self.accept:
+                accept_mask |= 1 << i
+
+        # empty DFA
+        Mprime = DFA()
+        Mprime.alpha = set(alpha)
+        Mprime.d_table = collections.defaultdict(dict)
+        Mprime.states = set()
+        Mprime.accept = set()
+
+        labels = dict()
+        used = set()
+        pending = list()
+
+        def label(mask: int) -> str:
+            """
+            names a subset by its states run together, as
+            before, with a suffix if that name is taken by a
+            different subset (e.g. q1+q10 and q11+q0)
+            """
+            if mask not in labels:
+                name = "".join(state_list[i] for i in range(mask.bit_length()) if mask >> i & 1) or kEMPTYSET
+                if name in used:
+                    name = "{0}#{1}".format(name, len(labels))
+                used.add(name)
+                labels[mask] = name
+                Mprime.states.add(name)
+                if mask & accept_mask:
+                    Mprime.accept.add(name)
+                pending.append(mask)
+            return labels[mask]
+
+        Mprime.start = label(self.__closure_mask([self.start]))
+        while pending:
+            X = pending.pop()
+            X_label = labels[X]
+            for char in alpha:
+                Mprime.d_table[X_label][char] = label(self.__step(X, moves[char]))
+
+        Mprime.compile()
+        if minimize:
+            Mprime.minimize_report = Mprime.minimize()
+        return Mprime
+
+
+class Node:
+    def __init__(self, this_set: set):
+        self.set: set = this_set
+        self.label: str = self.set2node(self.set)
+        self.d_table_entry: dict = {}
+        # self.complete = False
+
+    def __hash__(self):
+        return hash(self.label)
+
+    def __str__(self):
+        return "Node: {0}".format(self.label)
+
+    def __eq__(self, other):
+        if hash(self) == hash(other):
+            return True
+        else:
+            return False
+
+    # def completed(self):
+    #     self.complete = True
+
+    # def is_complete(self):
+    #     return self.complete
+
+    def set2node(self, _set: set) -> str:
+        temp = ""
+        temp_list = list()
+        for this_item in _set:
+            temp_list.append(this_item)
+        temp_list.sort()
+        for a in temp_list:
+            temp += a
+        if temp == "":
+            temp = kEMPTYSET
+        return temp
+
+    def set_d_table_entry(self, _a: str, _node: "Node"):
+        self.d_table_entry[_a] = _node
+
+    def get_d_table_entry(self, _a: str) -> "Node":
+        try:
+            ret = self.d_table_entry[_a]
+        except KeyError:
+            ret = None
+        return ret
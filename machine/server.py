@@ -0,0 +1,290 @@
+import os
+import sys
+import copy
+import json
+import time
+import asyncio
+import hashlib
+from .constants import *
+from .base import TMLimitExceeded, InvalidCharacterInTape
+from .tape import TMTape
+from .tm import TM, NTM, MTM, TMResult
+from .dfa import DFA
+from .nfa import NFAlambda
+
+# request "kind" -> machine class
+kKINDS = {"tm": TM, "ntm": NTM, "mtm": MTM, "dfa": DFA, "nfa": NFAlambda}
+# config extension -> kind used when a request doesn't give one
+kEXTENSION_KINDS = {".dfa": "dfa", ".nfal": "nfa"}
+# asyncio.current_task() is new in Python 3.7
+_current_task = getattr(asyncio, "current_task", None) or asyncio.Task.current_task
+
+
+def _serve_offloaded(tm: TM, limits: dict) -> dict:
+    """
+    finishes a run in a worker process, from the
+    configuration the server got it to
+    """
+    if tm.nondeterministic:
+        return tm.run(trace=kTRACE_NONE, max_steps=limits["max_steps"], timeout=limits["timeout"]).as_dict()
+    return tm.run(resume=True, **limits).as_dict()
+
+
+class MachineServer:
+    """
+    keeps machines loaded between requests and runs
+    them for clients over a socket. Requests and
+    responses are JSON objects, one per line, and
+    responses carry the id of their request, since a
+    connection's requests are served concurrently.
+    Machines are cached by kind, path and a hash of
+    the config, so an edited config is loaded again.
+    TM runs advance kSERVER_SLICE steps at a time,
+    letting other requests run in between, and move
+    to a worker process once they pass offload_steps.
+    NTM searches always run in a worker
+    """
+
+    def __init__(self, workers: int = None, slice_steps: int = kSERVER_SLICE,
+                 offload_steps: int = kSERVER_OFFLOAD_STEPS):
+        """
+        :param workers: number of worker processes, defaults to the cpu count.
+        0 runs everything in the server
+        :param slice_steps: steps a run takes before letting other requests run
+        :param offload_steps: steps after which a run moves to a worker
+        """
+        self.workers = os.cpu_count() if workers is None else workers
+        self.slice_steps = slice_steps
+        self.offload_steps = offload_steps
+        # (kind, path, digest) -> machine
+        self.machines = dict()
+        # path -> (mtime, size, digest) of the config when it was last hashed
+        self.digests = dict()
+        self.hits = dict()
+        self.served = 0
+        self.running = 0
+        self.offloaded = 0
+        self.pool = None
+        self.server = None
+        # task serving a connection -> its reader
+        self.connections = dict()
+
+    def __digest(self, path: str) -> str:
+        """
+        hash of a config, only read again when the
+        file's modification time or size has changed
+        """
+        stat = os.stat(path)
+        known = self.digests.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def machine(self, path: str, kind: str = None) -> tuple:
+        """
+        the loaded machine for a config, loading it if
+        it isn't cached or the config has changed
+        :param path: path of the config
+        :param kind: "tm", "ntm", "mtm", "dfa" or "nfa", by default
+        from the extension (.dfa, .nfal, anything else is a TM)
+        :return: (key, machine)
+        """
+        path = os.path.realpath(path)
+        if kind is None:
+            kind = kEXTENSION_KINDS.get(os.path.splitext(path)[1], "tm")
+        if kind not in kKINDS:
+            raise ValueError("unknown kind", kind)
+        key = (kind, path, self.__digest(path))
+        if key not in self.machines:
+            # drop the machines loaded from an older version of the config
+            for stale in [other for other in self.machines if other[:2] == key[:2]]:
+                del self.machines[stale]
+                del self.hits[stale]
+            M = kKINDS[kind]()
+            M.config(path)
+            self.machines[key] = M
+            self.hits[key] = 0
+        self.hits[key] += 1
+        return key, self.machines[key]
+
+    async def handle(self, request: dict) -> dict:
+        """
+        serves one request. {"op": "run"} (the default)
+        runs a machine on an input and answers with its
+        result: "machine" is the config path, "input" the
+        word, and "kind", "max_steps", "max_cells",
+        "timeout" and "offload" are optional (NTM runs
+        take no "max_cells"). {"op":
+        "load"} only loads the machine and {"op": "stats"}
+        reports on the server
+        :param request: decoded request
+        :return: response
+        """
+        response = {"id": request.get("id")}
+        try:
+            op = request.get("op", "run")
+            if op == "stats":
+                response.update(self.stats())
+            elif op == "load":
+                key, _ = self.machine(request["machine"], request.get("kind"))
+                response.update({"kind": key[0], "path": key[1], "digest": key[2]})
+            elif op == "run":
+                self.running += 1
+                try:
+                    response.update(await self.__run(request))
+                finally:
+                    self.running -= 1
+                self.served += 1
+            else:
+                raise ValueError("unknown op", op)
+        except Exception as e:
+            response["error"] = "{0}: {1}".format(type(e).__name__, e)
+        return response
+
+    async def __run(self, request: dict) -> dict:
+        _, M = self.machine(request["machine"], request.get("kind"))
+        w = request.get("input", "")
+        if not isinstance(M, TM):
+            try:
+                accepted = M.run(w)
+            except InvalidCharacterInTape:
+                return {"verdict": kVERDICT_INVALID}
+            return {"verdict": kVERDICT_ACCEPTED if accepted else kVERDICT_REJECTED}
+        # a copy shares the compiled tables but runs on its own tape
+        M = copy.copy(M)
+        try:
+            M.load(TMTape(w))
+        except InvalidCharacterInTape:
+            return TMResult(kVERDICT_INVALID, 0, None, 0, w).as_dict()
+        M.reset()
+        max_steps = request.get("max_steps")
+        max_cells = request.get("max_cells")
+        timeout = request.get("timeout")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if M.nondeterministic and max_cells is not None:
+            # the search keeps trimmed tapes, not how far each branch's head went
+            raise ValueError("max_cells isn't supported for NTM runs")
+        offload = self.workers and (M.nondeterministic or request.get("offload", False))
+        if M.nondeterministic and not offload:
+            return M.run(trace=kTRACE_NONE, max_steps=max_steps, timeout=timeout).as_dict()
+        verdict = None
+        try:
+            while not offload:
+                budget = self.slice_steps if max_steps is None else min(self.slice_steps, max_steps - M.steps)
+                if M.advance(budget, sys.maxsize if max_cells is None else max_cells):
+                    return M.result().as_dict()
+                if max_steps is not None and M.steps >= max_steps:
+                    raise TMLimitExceeded("steps", max_steps)
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TMLimitExceeded("timeout", timeout)
+                offload = self.workers and M.steps >= self.offload_steps
+                await asyncio.sleep(0)
+        except TMLimitExceeded:
+            verdict = kVERDICT_EXHAUSTED
+        if verdict is not None:
+            return M.result(verdict=verdict).as_dict()
+        return await self.__offload(M, {"max_steps": max_steps, "max_cells": max_cells,
+                                        "timeout": None if deadline is None else max(deadline - time.monotonic(), 0)})
+
+    async def __offload(self, M: TM, limits: dict) -> dict:
+        """
+        finishes a run in the worker pool, started on
+        first use
+        """
+        # only servers that offload need the process pool machinery
+        import concurrent.futures
+
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self.offloaded += 1
+        return await asyncio.get_event_loop().run_in_executor(self.pool, _serve_offloaded, M, limits)
+
+    def stats(self) -> dict:
+        """
+        :return: the loaded machines and request counts
+        """
+        return {"machines": [{"kind": key[0], "path": key[1], "digest": key[2], "hits": self.hits[key]}
+                             for key in self.machines],
+                "served": self.served, "running": self.running, "offloaded": self.offloaded}
+
+    async def __respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not an object")
+        except ValueError as e:
+            response = {"id": None, "error": "{0}: {1}".format(type(e).__name__, e)}
+        else:
+            response = await self.handle(request)
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def __connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        serves the requests of one client, each as its
+        own task, until the client closes its side
+        """
+        tasks = set()
+        self.connections[_current_task()] = reader
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.__respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[_current_task()]
+            writer.close()
+
+    async def start(self, host: str = kSERVER_HOST, port: int = kSERVER_PORT, path: str = None) -> None:
+        """
+        starts listening, on a Unix socket if a path
+        is given and on TCP otherwise
+        :param host: TCP address
+        :param port: TCP port, 0 picks a free one
+        :param path: Unix socket path
+        :return:
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.__connection, path, limit=kSERVER_LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_server(self.__connection, host, port, limit=kSERVER_LINE_LIMIT)
+
+    async def serve_forever(self) -> None:
+        if not hasattr(self.server, "serve_forever"):
+            # Python 3.6 servers serve from the start until they are closed
+            await self.server.wait_closed()
+            return
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        stops listening, closes the open connections
+        once their requests are answered and shuts the
+        worker pool down
+        :return:
+        """
+        if self.server is not None:
+            self.server.close()
+            # stop reading requests, the ones already read are still answered
+            for reader in self.connections.values():
+                reader.feed_eof()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.pool is not None:
+            if sys.version_info >= (3, 9):
+                self.pool.shutdown(cancel_futures=True)
+            else:
+                self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,334 @@
+import collections
+import array
+from .constants import *
+
+
+class Tape:
+    def __getitem__(self, item: int) -> str:
+        return self.read(item)
+
+    def __setitem__(self, key: int, value: str) -> None:
+        self.write(value, key)
+
+    def __add__(self, other: "Tape") -> "Tape":
+        return Tape(str(self) + str(other))
+
+    def __init__(self, in_string):
+        self.characters = list(in_string)
+
+    def __str__(self):
+        return "".join(self.characters)
+
+    def read(self, position):
+        return self.characters[position]
+
+    def write(self, character, position):
+        self.characters[position] = character
+
+
+class TMTape(Tape):
+    """
+    Implements an infinite tape for use in
+    Turing Machines. Cells hold integer symbol
+    codes in a bytearray that grows geometrically
+    in both directions; symbols[code] is the
+    character for a code and the blank is always
+    code 0
+    """
+
+    def __getitem__(self, item: int) -> str:
+        return self.read(item)
+
+    def __setitem__(self, key: int, value: str) -> None:
+        return self.write(value, key)
+
+    def __add__(self, other: "TMTape") -> "TMTape":
+        return TMTape(str(self).lstrip(kBLANK) + str(other).rstrip(kBLANK))
+
+    def code(self, character: str) -> int:
+        """
+        returns the code for a character, adding
+        it to the tape's symbol table if needed.
+        a tape with more than 256 symbols moves
+        its cells into a wider array
+        :param character: character to look up
+        :return: the character's code
+        """
+        try:
+            return self.codes[character]
+        except KeyError:
+            if len(self.symbols) == 256 and isinstance(self.cells, bytearray):
+                self.cells = array.array("H", iter(self.cells))
+            self.codes[character] = len(self.symbols)
+            self.symbols.append(character)
+            return self.codes[character]
+
+    def recode(self, symbols: list) -> None:
+        """
+        renumbers the tape so that symbols[i] has
+        code i. Any other symbols already known to
+        the tape keep codes after those
+        :param symbols: symbol list, symbols[0] must be the blank
+        :return:
+        """
+        new_symbols = list(symbols)
+        known = set(symbols)
+        new_symbols.extend(x for x in self.symbols if x not in known)
+        new_codes = {symbol: i for i, symbol in enumerate(new_symbols)}
+        mapping = [new_codes[symbol] for symbol in self.symbols]
+        if len(new_symbols) <= 256 and isinstance(self.cells, bytearray):
+            self.cells = self.cells.translate(bytes(mapping + [0] * (256 - len(mapping))))
+        else:
+            self.cells = array.array("H", (mapping[x] for x in self.cells))
+        self.symbols = new_symbols
+        self.codes = new_codes
+
+    def reserve(self, position: int) -> None:
+        """
+        makes sure there is a cell for a position,
+        at least doubling the storage on whichever
+        side the position lies
+        :param position: position that must be addressable
+        :return:
+        """
+        index = self.origin + position
+        if index < 0:
+            grow = max(len(self.cells), -index)
+            self.cells[0:0] = self.__blanks(grow)
+            self.origin += grow
+        elif index >= len(self.cells):
+            self.cells.extend(self.__blanks(max(len(self.cells), index - len(self.cells) + 1)))
+
+    def __blanks(self, count: int):
+        if isinstance(self.cells, bytearray):
+            return bytes(count)
+        return array.array("H", bytes(2 * count))
+
+    def alphabet(self) -> set:
+        """
+        returns the set of characters on the tape,
+        including the blank
+        :return: character set
+        """
+        return {self.symbols[x] for x in set(self.cells)}.union({kBLANK})
+
+    def write(self, character: str, position: int) -> None:
+        """
+        writes a character to a specified position
+        on the tape.
+        :param character: character to be added to the string
+        :param position: index of the location to add the character
+        :return:
+        """
+        code = self.code(character)
+        index = self.origin + position
+        if not 0 <= index < len(self.cells):
+            self.reserve(position)
+            index = self.origin + position
+        self.cells[index] = code
+        if position < self.lo:
+            self.lo = position
+        elif position > self.hi:
+            self.hi = position
+
+    def __str__(self) -> str:
+        """
+        returns a string of the contents of the tape
+        :return: tape string
+        """
+        neg_str = "".join(map(self.symbols.__getitem__, self.cells[self.origin + self.lo:self.origin]))
+        pos_str = "".join(map(self.symbols.__getitem__, self.cells[self.origin:self.origin + self.hi + 1]))
+        if (pos_str[-1] != kBLANK):
+            pos_str += kBLANK
+        try:
+            if (neg_str[-1] != kBLANK):
+                neg_str = kBLANK + neg_str
+        except IndexError:
+            pass
+        return "{0}{1}".format(neg_str, pos_str)
+
+    def read(self, position: int) -> str:
+        """
+        gets the character at the specified position.
+        because the tape is infinite, if it's outside
+        of the previously specified range, returns a
+        blank character
+        :param position: index to read
+        :return: the character at that position
+        """
+        index = self.origin + position
+        if 0 <= index < len(self.cells):
+            return self.symbols[self.cells[index]]
+        return kBLANK
+
+    def __init__(self, in_string):
+        """
+        returns an instance of the TMtape class
+        based on the input string
+        :param in_string:
+        """
+        self.symbols = [kBLANK]
+        self.codes = {kBLANK: 0}
+        self.cells = bytearray(1)
+        for character in in_string:
+            code = self.code(character)
+            self.cells.append(code)
+        self.cells.append(0)
+        # origin is the index of position 0 in cells, lo and hi
+        # are the leftmost and rightmost positions on the tape
+        self.origin = 0
+        self.lo = 0
+        self.hi = len(self.cells) - 1
+
+
+class RLETape(Tape):
+    """
+    Implements an infinite tape as runs of
+    (character, count), for tapes that are mostly
+    long stretches of the same character. The runs
+    are kept in two stacks either side of a cursor
+    run, so moving the head and writing near it is
+    O(1) amortized and memory grows with the number
+    of runs rather than the number of cells. Renders
+    exactly like a TMTape with the same contents
+    """
+
+    def __getitem__(self, item: int) -> str:
+        return self.read(item)
+
+    def __setitem__(self, key: int, value: str) -> None:
+        return self.write(value, key)
+
+    def __add__(self, other: "RLETape") -> "RLETape":
+        return RLETape(str(self).lstrip(kBLANK) + str(other).rstrip(kBLANK))
+
+    def __seek(self, position: int) -> list:
+        """
+        moves the cursor to the run holding a
+        position within the tape
+        :param position: position to find
+        :return: the run
+        """
+        while position < self.start:
+            run = self.left.pop()
+            self.right.append(run)
+            self.start -= run[1]
+        while position >= self.start + self.right[-1][1]:
+            run = self.right.pop()
+            self.left.append(run)
+            self.start += run[1]
+        return self.right[-1]
+
+    def read(self, position: int) -> str:
+        """
+        gets the character at the specified position.
+        outside of the written range this is a blank
+        :param position: index to read
+        :return: the character at that position
+        """
+        if position < self.lo or position > self.hi:
+            return kBLANK
+        return self.__seek(position)[0]
+
+    def write(self, character: str, position: int) -> None:
+        """
+        writes a character to a specified position
+        on the tape, splitting the run it falls in and
+        merging with the neighbouring runs as needed
+        :param character: character to be added to the string
+        :param position: index of the location to add the character
+        :return:
+        """
+        if position < self.lo:
+            if self.left:
+                self.__extend(self.left, self.lo - position)
+            elif self.right[-1][0] == kBLANK:
+                self.right[-1][1] += self.lo - position
+                self.start = position
+            else:
+                self.left.append([kBLANK, self.lo - position])
+            self.lo = position
+        elif position > self.hi:
+            self.__extend(self.right, position - self.hi)
+            self.hi = position
+        run = self.__seek(position)
+        if run[0] == character:
+            return
+        before = position - self.start
+        after = run[1] - before - 1
+        self.right.pop()
+        if after:
+            self.right.append([run[0], after])
+        if before:
+            self.left.append([run[0], before])
+        self.right.append([character, 1])
+        self.start = position
+        # merge with equal neighbours
+        if not before and self.left and self.left[-1][0] == character:
+            merged = self.left.pop()
+            self.right[-1][1] += merged[1]
+            self.start -= merged[1]
+        if not after and len(self.right) > 1 and self.right[-2][0] == character:
+            merged = self.right.pop()
+            self.right[-1][1] += merged[1]
+
+    @staticmethod
+    def __extend(runs: collections.deque, count: int) -> None:
+        """
+        adds blanks at the far end of a stack of runs
+        """
+        if runs[0][0] == kBLANK:
+            runs[0][1] += count
+        else:
+            runs.appendleft([kBLANK, count])
+
+    def runs(self) -> list:
+        """
+        returns the runs from the leftmost position
+        :return: list of (character, count)
+        """
+        return [tuple(run) for run in self.left] + [tuple(run) for run in reversed(self.right)]
+
+    def alphabet(self) -> set:
+        """
+        returns the set of characters on the tape,
+        including the blank
+        :return: character set
+        """
+        return {run[0] for run in self.left}.union({run[0] for run in self.right}, {kBLANK})
+
+    def __str__(self) -> str:
+        """
+        returns a string of the contents of the tape
+        :return: tape string
+        """
+        contents = "".join(character * count for character, count in self.runs())
+        neg_str = contents[:-self.lo]
+        pos_str = contents[-self.lo:]
+        if (pos_str[-1] != kBLANK):
+            pos_str += kBLANK
+        try:
+            if (neg_str[-1] != kBLANK):
+                neg_str = kBLANK + neg_str
+        except IndexError:
+            pass
+        return "{0}{1}".format(neg_str, pos_str)
+
+    def __init__(self, in_string):
+        """
+        returns an instance of the RLETape class
+        based on the input string
+        :param in_string:
+        """
+        self.left = collections.deque()
+        self.right = collections.deque()
+        for character in [kBLANK] + list(in_string) + [kBLANK]:
+            if self.right and self.right[0][0] == character:
+                self.right[0][1] += 1
+            else:
+                self.right.appendleft([character, 1])
+        # start is the position of the first cell of the cursor run,
+        # which is always right[-1]; lo and hi are the ends of the tape
+        self.start = 0
+        self.lo = 0
+        self.hi = len(in_string) + 1
@@ -0,0 +1,51 @@
+from unittest import TestCase
+import machine
+import os
+
+class TestDFA(TestCase):
+    def test_exec(self):
+        M = machine.DFA(os.path.join("..", "configs", "ex_ab.dfa"))
+        M.load(machine.Tape("aab"))
+        ret = M.exec()
+        self.assertTrue(ret[machine.kEXEC_ACCEPT])
+        self.assertEqual(ret[machine.kEXEC_OUTPUT], "state: q0, character: a, new state: q1\n"
+                                                    "state: q1, character: a, new state: q1\n"
+                                                    "state: q1, character: b, new state: q2\n"
+                                                    "accepted aab, state: q2\n")
+        M.load(machine.Tape("abc"))
+        with self.assertRaises(machine.InvalidCharacterInTape):
+            M.exec()
+
+    def test_run(self):
+        M = machine.DFA(os.path.join("..", "configs", "ex_ab.dfa"))
+        for w in ["", "ab", "aab", "abba", "babab", "bbbbab"]:
+            M.load(machine.Tape(w))
+            expected = M.exec()[machine.kEXEC_ACCEPT]
+            self.assertEqual(M.run(), expected)
+            self.assertEqual(M.run(w), expected)
+            self.assertEqual(M.run(w.encode()), expected)
+        with self.assertRaises(machine.InvalidCharacterInTape):
+            M.run(b"abc")
+        with self.assertRaises(machine.InvalidCharacterInTape):
+            M.run("abc")
+
+    def test_minimize(self):
+        M = machine.DFA()
+        M.alpha = {"a", "b"}
+        M.states = {"A", "B", "C", "D", "E", "F"}
+        M.d_table = {"A": {"a": "B", "b": "C"},
+                     "B": {"a": "B", "b": "D"},
+                     "C": {"a": "B", "b": "C"},
+                     "D": {"a": "B", "b": "C"},
+                     "E": {"a": "D", "b": "F"},
+                     "F": {"a": "E", "b": "E"}}
+        M.start = "A"
+        M.accept = {"D"}
+        words = [""]
+        for i in range(6):
+            words += [w + x for w in words if len(w) == i for x in "ab"]
+        expected = [M.run(w) for w in words]
+        report = M.minimize()
+        self.assertDictEqual(report, {"before": 6, "unreachable": 2, "merged": 1, "after": 3})
+        self.assertSetEqual(M.states, {"A", "B", "D"})
+        self.assertListEqual([M.run(w) for w in words], expected)
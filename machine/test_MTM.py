@@ -0,0 +1,64 @@
+from unittest import TestCase
+import machine
+import os
+
+
+class TestMTM(TestCase):
+    def test_config(self):
+        with self.assertRaises(machine.InvalidConfigBlock):
+            machine.TM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        M = machine.MTM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        self.assertEqual(M.tapes, 2)
+        self.assertEqual(str(M.d_table["q1"][("b", machine.kBLANK)]), "q2, (b, Б), (→, ←)")
+        self.assertIn('"Tapes": 2', M.dumps())
+
+    def test_transition(self):
+        trans = machine.TMTransition("q1, (a, b, Б), (→, ←, →)")
+        self.assertEqual(trans.character, ("a", "b", machine.kBLANK))
+        self.assertEqual(trans.direction, (machine.kRIGHT, machine.kLEFT, machine.kRIGHT))
+        self.assertEqual(machine.TMTransition("q1, (a, b), (↓, ←)").delta, (0, -1))
+        self.assertEqual(str(machine.TMTransition("q1, a, b, →, ←")), "q1, (a, b), (→, ←)")
+        with self.assertRaises(machine.BadTMTransition):
+            machine.TMTransition("q1, a, b, →")
+
+    def test_exec(self):
+        M = machine.MTM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        M.load(machine.TMTape("ab"))
+        trace = M.exec()
+        self.assertEqual(trace[0], "q0БabБ | q0ББ")
+        self.assertEqual(trace[3], "⊢Бabq2Б | Бq2aБ")
+        self.assertEqual(trace[-1][:8], "Accepted")
+
+    def test_run(self):
+        M = machine.MTM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        for word, verdict in [("aabb", machine.kVERDICT_ACCEPTED), ("aab", machine.kVERDICT_REJECTED),
+                              ("abb", machine.kVERDICT_REJECTED), ("aba", machine.kVERDICT_REJECTED)]:
+            M.load(machine.TMTape(word))
+            trace = M.exec()
+            M.load(machine.TMTape(word))
+            result = M.run(trace=machine.kTRACE_FULL)
+            self.assertEqual(result.verdict, verdict, word)
+            self.assertEqual(result.trace, trace[:-1])
+        # one pass over the input, where a single tape needs O(n^2) steps
+        M.load(machine.TMTape("a" * 1000 + "b" * 1000))
+        self.assertEqual(M.run().steps, 2003)
+
+    def test_load(self):
+        M = machine.MTM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        M.load(machine.TMTape("ab"), machine.TMTape("a"))
+        self.assertEqual(M.run().verdict, machine.kVERDICT_REJECTED)
+        with self.assertRaises(ValueError):
+            M.load(machine.TMTape("ab"), machine.TMTape(""), machine.TMTape(""))
+        with self.assertRaises(machine.InvalidCharacterInTape):
+            M.load(machine.TMTape("ab"), machine.TMTape("c"))
+
+    def test_max_cells(self):
+        M = machine.MTM(os.path.join("..", "configs", "ex_anbn2.tm"))
+        extents = list()
+        for Tape in [machine.TMTape, machine.RLETape]:
+            M.load(Tape("a" * 20 + "b" * 20))
+            self.assertEqual(M.run(max_cells=10).verdict, machine.kVERDICT_EXHAUSTED)
+            extents.append([(tape.lo, tape.hi) for tape in M.loaded_tapes])
+        # the step over the limit doesn't grow the second tape
+        self.assertEqual(extents[0], [(0, 41), (0, 9)])
+        self.assertEqual(extents[0], extents[1])
@@ -0,0 +1,61 @@
+from unittest import TestCase
+import itertools
+import machine
+import os
+
+class TestNFAlambda(TestCase):
+    @staticmethod
+    def accepts(N: machine.NFAlambda, w: str) -> bool:
+        current = N.lambda_closure2(N.start)
+        for char in w:
+            current = N.lambda_closure(set().union(*[N.d_table[state][char] for state in current]))
+        return bool(current.intersection(N.accept))
+
+    def test_convert(self):
+        N = machine.NFAlambda(os.path.join("..", "configs", "ex_nfal.nfal"))
+        D = N.convert()
+        self.assertEqual(D.start, "q0")
+        for length in range(7):
+            for w in map("".join, itertools.product("ab", repeat=length)):
+                self.assertEqual(D.run(w), self.accepts(N, w), w)
+        M = N.convert(minimize=True)
+        self.assertEqual(M.minimize_report["after"], len(M.states))
+        self.assertLessEqual(len(M.states), len(D.states))
+
+    def test_convert_labels(self):
+        # {a, bc} and {ab, c} both run together as "abc"
+        N = machine.NFAlambda()
+        N.states = {"a", "ab", "bc", "c"}
+        N.alpha = {machine.kLAMBA, "x"}
+        N.d_table = {"a": {machine.kLAMBA: {"bc"}, "x": {"ab"}},
+                     "ab": {machine.kLAMBA: set(), "x": set()},
+                     "bc": {machine.kLAMBA: set(), "x": {"c"}},
+                     "c": {machine.kLAMBA: set(), "x": set()}}
+        N.start = "a"
+        N.accept = {"c"}
+        D = N.convert()
+        self.assertEqual(len(D.states), 3)
+        self.assertListEqual([D.run("x" * i) for i in range(3)], [False, True, False])
+
+    def test_lambda_closure(self):
+        N = machine.NFAlambda(os.path.join("..", "configs", "ex_nfal.nfal"))
+        self.assertSetEqual(N.lambda_closure("q1"), {"q1", "q2"})
+        self.assertSetEqual(N.lambda_closure2({"q0", "q1"}), {"q0", "q1", "q2"})
+        self.assertIsNotNone(N.closure_cache)
+        self.assertSetEqual(N.t_table()["q1"]["a"], {"q3"})
+        N.config(os.path.join("..", "configs", "ex_nfal.nfal"))
+        self.assertIsNone(N.closure_cache)
+
+    def test_run(self):
+        N = machine.NFAlambda(os.path.join("..", "configs", "ex_nfal.nfal"))
+        D = N.convert()
+        for length in range(8):
+            for w in map("".join, itertools.product("ab", repeat=length)):
+                self.assertEqual(N.run(w), D.run(w), w)
+        self.assertLessEqual(len(N.lazy_dfa), machine.kLAZY_DFA_SIZE)
+        N.load(machine.Tape("aab"))
+        ret = N.exec()
+        self.assertTrue(ret[machine.kEXEC_ACCEPT])
+        self.assertEqual(ret[machine.kEXEC_OUTPUT].splitlines()[-1], "accepted aab, states: q0q3q4")
+        with self.assertRaises(machine.InvalidCharacterInTape):
+            N.run("abc")
@@ -0,0 +1,85 @@
+from unittest import TestCase
+import machine
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+class TestNTM(TestCase):
+    def test_config(self):
+        with self.assertRaises(machine.InvalidConfigBlock):
+            machine.TM(os.path.join("..", "configs", "ex_ntm.tm"))
+        M = machine.NTM(os.path.join("..", "configs", "ex_ntm.tm"))
+        self.assertIn('"q2, a, →"', M.dumps())
+
+    def test_run(self):
+        M = machine.NTM(os.path.join("..", "configs", "ex_ntm.tm"))
+        for word, verdict in [("baab", machine.kVERDICT_ACCEPTED), ("aa", machine.kVERDICT_ACCEPTED),
+                              ("abab", machine.kVERDICT_REJECTED), ("", machine.kVERDICT_REJECTED)]:
+            M.load(machine.TMTape(word))
+            self.assertEqual(M.run().verdict, verdict, word)
+
+    def test_witness(self):
+        M = machine.NTM(os.path.join("..", "configs", "ex_ntm.tm"))
+        M.load(machine.TMTape("bbaa"))
+        self.assertIsNone(M.run().trace)
+        M.load(machine.TMTape("bbaa"))
+        result = M.run(machine.kTRACE_FULL)
+        self.assertEqual(result.steps, 5)
+        self.assertEqual(result.state, "q3")
+        self.assertEqual(result.trace[0], "q0" + machine.kBLANK + "bbaa" + machine.kBLANK)
+        self.assertEqual(result.trace[-1], "⊢" + machine.kBLANK + "bbaaq3" + machine.kBLANK)
+        self.assertEqual(M.exec()[-1][:8], "Accepted")
+
+    def test_limits(self):
+        M = machine.NTM(os.path.join("..", "configs", "ex_ntm.tm"))
+        M.load(machine.TMTape("bbbbaa"))
+        self.assertEqual(M.run(max_steps=3).verdict, machine.kVERDICT_EXHAUSTED)
+        M.load(machine.TMTape("bbbbaa"))
+        self.assertEqual(M.run(max_configs=2).verdict, machine.kVERDICT_EXHAUSTED)
+        M.load(machine.TMTape("bbbbaa"))
+        self.assertEqual(M.run(timeout=0).verdict, machine.kVERDICT_EXHAUSTED)
+        with self.assertRaises(AttributeError):
+            M.step()
+        # branches that halt right at the depth limit aren't exhausted, as with TM.run
+        D = machine.TM(os.path.join("..", "configs", "ex_821.tm"))
+        N = machine.NTM(os.path.join("..", "configs", "ex_821.tm"))
+        for word in ["ab", "aa", "abab", ""]:
+            for max_steps in range(6):
+                D.load(machine.TMTape(word))
+                N.load(machine.TMTape(word))
+                expected = D.run(max_steps=max_steps).as_dict()
+                result = N.run(max_steps=max_steps).as_dict()
+                if expected["verdict"] == machine.kVERDICT_EXHAUSTED:
+                    # an unfinished search has no single branch to end on
+                    self.assertEqual(result["verdict"], expected["verdict"], (word, max_steps))
+                else:
+                    self.assertEqual(result, expected, (word, max_steps))
+
+    def test_looping(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "cycle.tm")
+            with open(config, "w", encoding="utf-8") as f:
+                json.dump({"Accept": [], "Alphabet": ["a"], "TapeAlphabet": ["Б", "a"], "Start": "q0",
+                           "States": ["q0", "q1"],
+                           "D-Table": {"q0": {"Б": ["q0, Б, ↓", "q1, Б, →"]},
+                                       "q1": {"Б": "q0, Б, ←"}}}, f, ensure_ascii=False)
+            M = machine.NTM(config)
+        # every branch comes back to a configuration already searched
+        M.load(machine.TMTape(""))
+        self.assertEqual(M.run().verdict, machine.kVERDICT_LOOPING)
+        self.assertEqual(M.run(max_steps=1).verdict, machine.kVERDICT_EXHAUSTED)
+        # q1 halts on the a
+        M.load(machine.TMTape("a"))
+        self.assertEqual(M.run().verdict, machine.kVERDICT_HALTED)
+
+    def test_cli_flags(self):
+        # a search has no single run to snapshot, trace or profile
+        for flags in [["-c", "run.tms"], ["-r", "run.tms"], ["-o", "run.tmt"], ["-p", "table"]]:
+            command = [sys.executable, "simulator.py", "-t", "configs/ex_ntm.tm", "-i", "ab", "-n"] + flags
+            done = subprocess.run(command, cwd="..", stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  universal_newlines=True)
+            self.assertEqual(done.returncode, 2)
+            self.assertIn("-n", done.stderr)
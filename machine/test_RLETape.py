@@ -0,0 +1,44 @@
+from unittest import TestCase
+import machine
+import os
+
+class TestRLETape(TestCase):
+    def test_write(self):
+        T = machine.RLETape("")
+        for i in range(10):
+            if i > 0:
+                T.write("a", i)
+        self.assertEqual(str(T), machine.kBLANK+"aaaaaaaaa"+machine.kBLANK)
+        for i in range(10):
+            i = -i
+            if i < 0:
+                T.write("b", i)
+        self.assertEqual(str(T), machine.kBLANK+"bbbbbbbbb"+machine.kBLANK+"aaaaaaaaa"+machine.kBLANK)
+        self.assertListEqual(T.runs(), [("b", 9), (machine.kBLANK, 1), ("a", 9)])
+
+    def test_read(self):
+        T = machine.RLETape("")
+        self.assertEqual(T.read(13), machine.kBLANK)
+        self.assertEqual(T.read(-7), machine.kBLANK)
+        T.write("a",  5)
+        T.write(T.read(6), 6)
+        self.assertEqual(str(T), machine.kBLANK * 5 + "a" + machine.kBLANK)
+
+    def test_runs(self):
+        T = machine.RLETape("aaaa")
+        T.write("b", 1000000)
+        self.assertEqual(len(T.runs()), 4)
+        T.write("b", 2)
+        self.assertListEqual(T.runs(), [(machine.kBLANK, 1), ("a", 1), ("b", 1), ("a", 2),
+                                        (machine.kBLANK, 999995), ("b", 1)])
+        T.write("a", 2)
+        self.assertListEqual(T.runs()[:3], [(machine.kBLANK, 1), ("a", 4), (machine.kBLANK, 999995)])
+
+    def test_run(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        M.load(machine.TMTape("abba"))
+        expected = M.run().as_dict()
+        M.load(machine.RLETape("abba"))
+        self.assertDictEqual(M.run().as_dict(), expected)
+        M.load(machine.RLETape("abba"))
+        self.assertEqual(M.exec()[-1], "Halted: " + expected["tape"].replace(machine.kBLANK, " "))
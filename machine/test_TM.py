@@ -1,7 +1,14 @@
-from unittest import TestCase
+from unittest import TestCase, skipUnless
+import importlib.util
 import machine
+import array
 import os
 import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
 
 class TestTM(TestCase):
     def test_load(self):
@@ -85,3 +92,367 @@ class TestTM(TestCase):
         with open(os.path.join("..", "configs", "export_file.tm"), "r", encoding="utf-8") as f:
             a = json.load(f)
         self.assertEqual(M.dumps(), json.dumps(a, sort_keys=True, indent=4, ensure_ascii=False))
+
+    def test_run(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_822.tm"))
+        for w in ["abc", "aabbcc", "aabc", "ca"]:
+            M.load(machine.TMTape(w))
+            trace = M.exec()
+            expected = (M.is_accepted(), M.current_state, M.current_position, str(M.loaded_tape))
+            M.load(machine.TMTape(w))
+            result = M.run()
+            self.assertEqual(result.steps, len(trace) - 2)
+            self.assertEqual(str(result), trace[-1])
+            self.assertIsNone(result.trace)
+            self.assertTupleEqual((result.accepted, result.state, result.position, result.tape), expected)
+
+    def test_run_trace(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        M.load(machine.TMTape("ab"))
+        trace = M.exec()
+        M.load(machine.TMTape("ab"))
+        result = M.run(machine.kTRACE_FULL)
+        self.assertEqual(result.verdict, machine.kVERDICT_HALTED)
+        self.assertListEqual(result.trace, trace[:-1])
+        M.load(machine.TMTape("ab"))
+        result = M.run(5)
+        self.assertListEqual(result.trace, trace[:-1:5] + [trace[-2]])
+
+    def test_iexec(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_821.tm"))
+        M.load(machine.TMTape("ab"))
+        trace = M.exec()
+        M.load(machine.TMTape("ab"))
+        configs = M.iexec()
+        self.assertEqual(next(configs), trace[0])
+        self.assertEqual(M.current_position, 0)
+        self.assertListEqual([trace[0]] + list(configs), trace)
+
+    def test_run_limits(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_loop.tm"))
+        M.load(machine.TMTape(""))
+        result = M.run(max_steps=1000)
+        self.assertEqual(result.verdict, machine.kVERDICT_EXHAUSTED)
+        self.assertEqual(result.steps, 1000)
+        M.load(machine.TMTape(""))
+        result = M.run(max_cells=50)
+        self.assertEqual(result.verdict, machine.kVERDICT_EXHAUSTED)
+        self.assertEqual(len(result.tape), 50)
+        M.load(machine.TMTape(""))
+        self.assertEqual(M.run(timeout=0.05).verdict, machine.kVERDICT_EXHAUSTED)
+        M.load(machine.TMTape("a"))
+        result = M.run(detect_loops=True)
+        self.assertEqual(result.verdict, machine.kVERDICT_LOOPING)
+        self.assertLess(result.steps, 10)
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "left_loop.tm")
+            with open(config, "w", encoding="utf-8") as f:
+                # keeps rewriting the cell left of the input
+                json.dump({"Accept": [], "Alphabet": ["a"], "TapeAlphabet": ["Б", "a"], "Start": "q0",
+                           "States": ["q0", "q1", "q2", "q3"],
+                           "D-Table": {"q0": {"Б": "q1, Б, ←"}, "q1": {"Б": "q2, a, →"},
+                                       "q2": {"Б": "q3, Б, ←"}, "q3": {"a": "q0, Б, →"}}}, f, ensure_ascii=False)
+            L = machine.TM(config)
+        L.load(machine.TMTape(""))
+        self.assertEqual(L.run(detect_loops=True).verdict, machine.kVERDICT_LOOPING)
+        M = machine.TM(os.path.join("..", "configs", "ex_822.tm"))
+        M.load(machine.TMTape("aabbcc"))
+        trace = M.exec()
+        M.load(machine.TMTape("aabbcc"))
+        self.assertEqual(str(M.run(max_steps=len(trace) - 2, detect_loops=True)), trace[-1])
+        M.load(machine.TMTape("aabbcc"))
+        self.assertEqual(M.run(max_steps=len(trace) - 3).verdict, machine.kVERDICT_EXHAUSTED)
+        M.load(machine.TMTape("aabbcc"))
+        self.assertListEqual(list(M.iexec(len(trace) - 3))[:-1], trace[:-2])
+
+    def test_run_batch(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_822.tm"))
+        inputs = ["abc", "aabbcc", "aabc", "abcd", ""] * 20
+        results = list(M.run_batch(inputs, workers=2, chunksize=7))
+        self.assertEqual(len(results), len(inputs))
+        for w, result in zip(inputs, results):
+            if w == "abcd":
+                self.assertEqual(result.verdict, machine.kVERDICT_INVALID)
+                continue
+            M.load(machine.TMTape(w))
+            self.assertDictEqual(result.as_dict(), M.run().as_dict())
+
+    @skipUnless(importlib.util.find_spec("numpy"), "requires numpy")
+    def test_run_lockstep(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        inputs = ["", "a", "ab", "abba", "babab", "aaaaaaaa", "abc"]
+        results = M.run_lockstep(inputs, max_steps=60)
+        for w, result in zip(inputs, results):
+            if w == "abc":
+                self.assertEqual(result.verdict, machine.kVERDICT_INVALID)
+                continue
+            M.load(machine.TMTape(w))
+            self.assertDictEqual(result.as_dict(), M.run(max_steps=60).as_dict())
+        # results built from the final arrays match run() row for row
+        M = machine.TM(os.path.join("..", "configs", "ex_822.tm"))
+        inputs = ["a" * (i % 4) + "b" * (i % 3) + "c" * (i % 5) + "d" * (i % 17 == 0) for i in range(200)]
+        for w, result in zip(inputs, M.run_lockstep(inputs)):
+            try:
+                M.load(machine.TMTape(w))
+            except machine.InvalidCharacterInTape:
+                self.assertEqual(result.verdict, machine.kVERDICT_INVALID)
+                continue
+            self.assertDictEqual(result.as_dict(), M.run().as_dict())
+
+    def test_run_macro(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        for w in ["", "b", "abba" * 10]:
+            for block in [1, 3, 8]:
+                for max_steps in [None, 1001]:
+                    M.load(machine.TMTape(w))
+                    expected = M.run(max_steps=max_steps).as_dict()
+                    M.load(machine.TMTape(w))
+                    self.assertDictEqual(M.run_macro(block, max_steps).as_dict(), expected)
+        M = machine.TM(os.path.join("..", "configs", "ex_loop.tm"))
+        M.load(machine.TMTape(""))
+        self.assertEqual(M.run_macro().verdict, machine.kVERDICT_LOOPING)
+
+    def test_run_macro_stationary_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "stay_loop.tm")
+            with open(config, "w", encoding="utf-8") as f:
+                json.dump({"Accept": [], "Alphabet": ["a"], "TapeAlphabet": ["Б", "a"], "Start": "q0",
+                           "States": ["q0"], "D-Table": {"q0": {"Б": "q0, Б, ↓"}}}, f, ensure_ascii=False)
+            M = machine.TM(config)
+        for block in [1, 4]:
+            for max_steps in [1, 10, 1000]:
+                M.load(machine.TMTape(""))
+                expected = M.run(max_steps=max_steps).as_dict()
+                self.assertEqual((expected["verdict"], expected["steps"]), (machine.kVERDICT_EXHAUSTED, max_steps))
+                M.load(machine.TMTape(""))
+                self.assertDictEqual(M.run_macro(block, max_steps).as_dict(), expected)
+        M.load(machine.TMTape(""))
+        self.assertEqual(M.run_macro().verdict, machine.kVERDICT_LOOPING)
+
+    def test_stationary(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_stay.tm"))
+        self.assertEqual(M.d_table["q1"][machine.kBLANK].delta, 0)
+        self.assertIn('"q2, 1, ↓"', M.dumps())
+        M.load(machine.TMTape("11"))
+        self.assertEqual(M.exec()[3:5], ["⊢Б11q1Б", "⊢Б11q21Б"])
+        for w in ["", "1", "111"]:
+            M.load(machine.TMTape(w))
+            result = M.run()
+            self.assertEqual((result.verdict, result.position, result.tape),
+                             (machine.kVERDICT_ACCEPTED, 0, machine.kBLANK + w + "1" + machine.kBLANK))
+            M.load(machine.TMTape(w))
+            self.assertEqual(M.run_macro().as_dict(), result.as_dict())
+
+    def test_transition(self):
+        trans = machine.TMTransition("q1, a, ↓")
+        self.assertEqual(trans, machine.TMTransition("q1", "a", machine.kSTATIONARY))
+        self.assertEqual((trans.delta, str(trans)), (0, "q1, a, ↓"))
+        self.assertIsNone(machine.TMTransition("q1, a, x").delta)
+        with self.assertRaises(AttributeError):
+            trans.state = "q2"
+
+    def test_compiled_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ex_821.tm")
+            shutil.copy(os.path.join("..", "configs", "ex_821.tm"), path)
+            machine.TM().config(path, cache=False)
+            self.assertFalse(os.path.exists(os.path.join(directory, "ex_821.tmc")))
+            M = machine.TM(path)
+            self.assertTrue(os.path.exists(os.path.join(directory, "ex_821.tmc")))
+            cached = machine.TM(path)
+            self.assertEqual(cached.c_table, M.c_table)
+            self.assertEqual(cached.dumps(), M.dumps())
+            M.load(machine.TMTape("ab"))
+            cached.load(machine.TMTape("ab"))
+            self.assertEqual(cached.exec(), M.exec())
+            # a changed config is compiled again
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+            config["Accept"] = []
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(config, f, ensure_ascii=False)
+            self.assertEqual(machine.TM(path).accept, set())
+            # as is one whose cache is damaged
+            with open(os.path.join(directory, "ex_821.tmc"), "r+b") as f:
+                f.truncate(40)
+            self.assertEqual(machine.TM(path).accept, set())
+            # the cache is per kind of machine
+            compiled = [entry for entry in machine.MTM(path).c_table if entry is not None]
+            self.assertIsInstance(compiled[0][1], tuple)
+
+    def test_config_keys(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ex_821.tm")
+            with open(os.path.join("..", "configs", "ex_821.tm"), encoding="utf-8") as f:
+                config = json.load(f)
+            # keys the compiled table can't hold would be lost in the .tmc cache
+            for state, char in [("q0", "c"), ("q9", "a")]:
+                changed = json.loads(json.dumps(config))
+                changed["D-Table"].setdefault(state, dict())[char] = "q0, a, →"
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(changed, f, ensure_ascii=False)
+                with self.assertRaises(machine.InvalidConfigBlock):
+                    machine.TM(path)
+                self.assertFalse(os.path.exists(os.path.join(directory, "ex_821.tmc")))
+
+    def test_compiled_cache_truncated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ex_812.tm")
+            shutil.copy(os.path.join("..", "configs", "ex_812.tm"), path)
+            expected = machine.TM(path).c_table
+            compiled = os.path.join(directory, "ex_812.tmc")
+            size = os.path.getsize(compiled)
+            # cut off partway through the table, on and off a 4 byte boundary
+            for cut in [2, 4, 40]:
+                with open(compiled, "r+b") as f:
+                    f.truncate(size - cut)
+                self.assertEqual(machine.TM(path).c_table, expected)
+                self.assertEqual(os.path.getsize(compiled), size)
+
+    def test_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot = os.path.join(directory, "run.tms")
+            for cls, config, w in [(machine.TM, "ex_812.tm", "abba" * 20),
+                                   (machine.TM, "ex_loop.tm", ""),
+                                   (machine.MTM, "ex_anbn2.tm", "a" * 800 + "b" * 800)]:
+                M = cls(os.path.join("..", "configs", config))
+                M.load(machine.TMTape(w))
+                uninterrupted = M.run(max_steps=5000)
+                M.load(machine.TMTape(w))
+                # the run is cut short after a snapshot, then resumed elsewhere
+                M.run(max_steps=1000, checkpoint=snapshot, checkpoint_steps=300)
+                resumed = cls(os.path.join("..", "configs", config))
+                resumed.restore(snapshot)
+                self.assertEqual(resumed.steps, M.steps)
+                self.assertEqual(resumed.run(max_steps=5000, resume=True).as_dict(), uninterrupted.as_dict())
+            with self.assertRaises(machine.InvalidSnapshot):
+                machine.TM(os.path.join("..", "configs", "ex_821.tm")).restore(snapshot)
+
+    def test_resume_finished(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "accept_early.tm")
+            with open(config, "w", encoding="utf-8") as f:
+                # q1 accepts but still has a transition
+                json.dump({"Accept": ["q1"], "Alphabet": ["a"], "TapeAlphabet": ["Б", "a"], "Start": "q0",
+                           "States": ["q0", "q1", "q2"],
+                           "D-Table": {"q0": {"Б": "q1, a, →"}, "q1": {"Б": "q2, Б, ↓"}}}, f, ensure_ascii=False)
+            snapshot = os.path.join(directory, "run.tms")
+            for config, w in [(config, ""), (os.path.join("..", "configs", "ex_821.tm"), "abab")]:
+                M = machine.TM(config)
+                M.load(machine.TMTape(w))
+                finished = M.run(checkpoint=snapshot)
+                resumed = machine.TM(config)
+                resumed.restore(snapshot)
+                self.assertEqual(resumed.run(resume=True).as_dict(), finished.as_dict())
+
+    def test_render(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        for w in ["", "ab", "abba" * 5]:
+            M.load(machine.TMTape(w))
+            M.reset()
+            expected = [M.get_c()]
+            while True:
+                try:
+                    expected.append(M.step())
+                except machine.TMTransitionUndefined:
+                    break
+            M.load(machine.TMTape(w))
+            self.assertEqual(list(M.iexec())[:-1], expected)
+            M.load(machine.TMTape(w))
+            self.assertEqual(M.run(trace=3).trace[:-1], expected[:-1:3])
+
+    def test_window(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_821.tm"))
+        M.load(machine.TMTape("aa"))
+        self.assertEqual(list(M.iexec(window=1)),
+                         ["Бq0Бa", "⊢Бq1aa", "⊢aq2aБ", "⊢aq3ББ", "Accepted:  aa "])
+        M.load(machine.TMTape("aa"))
+        self.assertEqual(M.run(trace=machine.kTRACE_FULL, window=0).trace[-1], "⊢q3Б")
+
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace = os.path.join(directory, "trace.tmt")
+            M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+            M.load(machine.TMTape("abba" * 5))
+            expected = M.exec()
+            M.load(machine.TMTape("abba" * 5))
+            self.assertEqual(str(M.record(trace, keyframe_steps=200)), expected[-1])
+            with machine.TraceReader(trace) as R:
+                self.assertEqual(R.total, len(expected) - 2)
+                self.assertEqual(list(R.replay()), expected)
+                for step in [700, 0, 199, 200, 201, R.total]:
+                    self.assertEqual(R.config(step), expected[step])
+                self.assertEqual(list(R.configs(198, 203)), expected[198:203])
+            self.assertLess(os.path.getsize(trace) * 10, len("".join(expected).encode("utf-8")))
+            M.load(machine.TMTape("abba"))
+            self.assertEqual(M.record(trace, max_steps=10).verdict, machine.kVERDICT_EXHAUSTED)
+            with machine.TraceReader(trace) as R:
+                self.assertEqual(R.total, 10)
+                self.assertEqual(R.result().verdict, machine.kVERDICT_EXHAUSTED)
+
+    def test_replay_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace = os.path.join(directory, "trace.tmt")
+            M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+            M.load(machine.TMTape("abba"))
+            M.record(trace)
+            M.load(machine.TMTape("abba"))
+            expected = list(M.iexec(window=2))
+
+            def replay(*args: str) -> list:
+                # simulator.py paths are relative to the repository root, and the
+                # tape symbols need UTF-8 whatever the locale (Python 3.6 doesn't coerce it)
+                command = [sys.executable, "simulator.py", "replay", os.path.relpath(trace, "..")] + list(args)
+                return subprocess.run(command, cwd="..", check=True, stdout=subprocess.PIPE, encoding="utf-8",
+                                      env=dict(os.environ, PYTHONIOENCODING="utf-8")).stdout.splitlines()
+            self.assertEqual(replay("-v", "2"), expected)
+            self.assertEqual(replay("3", "-v", "2"), expected[3:4])
+            self.assertEqual(replay("3", "5", "-v", "2"), expected[3:6])
+
+    def test_profile(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_822.tm"))
+        M.load(machine.TMTape("aabbcc"))
+        profile = machine.TMProfile()
+        result = M.run(profile=profile)
+        self.assertEqual(profile.steps, result.steps)
+        self.assertEqual(sum(hits for hits, *_ in profile.transitions()), result.steps)
+        self.assertEqual(profile.transitions()[0][:3], (3, "q4", "Y"))
+        self.assertEqual((profile.left, profile.right, profile.reversals), (0, 8, 4))
+        self.assertIn("step", profile.phases)
+        report = json.loads(json.dumps(profile.as_dict()))
+        self.assertEqual(report["states"]["q4"], 8)
+        # counters carry over between advance() calls
+        M.load(machine.TMTape("aabbcc"))
+        M.reset()
+        chunked = machine.TMProfile()
+        while not M.advance(5, profile=chunked):
+            pass
+        self.assertEqual(chunked.as_dict()["transitions"], report["transitions"])
+        self.assertEqual(chunked.reversals, profile.reversals)
+        # a phase around the run keeps its own time
+        M.load(machine.TMTape("aabbcc"))
+        nested = machine.TMProfile()
+        with nested.phase("total"):
+            time.sleep(0.05)
+            M.run(profile=nested)
+        self.assertGreaterEqual(nested.phases["total"], 0.05)
+        self.assertLess(nested.phases["step"], nested.phases["total"] - 0.04)
+
+    def test_advance_combined(self):
+        M = machine.TM(os.path.join("..", "configs", "ex_loop.tm"))
+        M.load(machine.TMTape("a"))
+        expected = M.run(detect_loops=True)
+        self.assertEqual(expected.verdict, machine.kVERDICT_LOOPING)
+        M.load(machine.TMTape("a"))
+        profile = machine.TMProfile()
+        result = M.run(detect_loops=True, profile=profile)
+        self.assertDictEqual(result.as_dict(), expected.as_dict())
+        self.assertEqual(profile.steps, result.steps)
+        # one loop with a detector, a record and a profile sees every step once
+        M.load(machine.TMTape("a"))
+        M.reset()
+        record = array.array("I")
+        profile = machine.TMProfile()
+        with self.assertRaises(machine.TMLoopDetected):
+            M.advance(detector=machine.LoopDetector(M.loaded_tape), record=record, profile=profile)
+        self.assertEqual((len(record), profile.steps, M.steps), (result.steps,) * 3)
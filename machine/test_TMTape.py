@@ -28,3 +28,24 @@ class TestTMTape(TestCase):
         test = test + "a"
         test = test + machine.kBLANK
         self.assertEqual(str(T), test)
+
+    def test_growth(self):
+        T = machine.TMTape("ab")
+        for i in range(1, 1001):
+            T.write("a", -i)
+            T.write("b", 1000 + i)
+        self.assertEqual(T.read(-1000), "a")
+        self.assertEqual(T.read(2000), "b")
+        self.assertEqual(T.read(-1001), machine.kBLANK)
+        self.assertEqual(str(T), machine.kBLANK + "a" * 1000 + machine.kBLANK + "ab" + machine.kBLANK * 998 + "b" * 1000
+                         + machine.kBLANK)
+
+    def test_recode(self):
+        T = machine.TMTape("abc")
+        T.recode([machine.kBLANK, "c", "b"])
+        self.assertListEqual(T.symbols, [machine.kBLANK, "c", "b", "a"])
+        self.assertEqual(str(T), machine.kBLANK + "abc" + machine.kBLANK)
+        for i in range(300):
+            T.write(chr(0x100 + i), 10 + i)
+        self.assertEqual(T.read(309), chr(0x100 + 299))
+        self.assertEqual(T.read(2), "b")
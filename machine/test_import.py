@@ -0,0 +1,35 @@
+from unittest import TestCase, skipIf
+import subprocess
+import sys
+
+
+def loaded_modules(code: str) -> set:
+    """
+    runs code in a fresh interpreter
+    :return: the modules it has loaded afterwards
+    """
+    code += "; import sys; print(' '.join(sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd="..", check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return set(output.split())
+
+
+class TestImport(TestCase):
+    @skipIf(sys.version_info < (3, 7), "Python 3.6 imports every module up front")
+    def test_lazy(self):
+        modules = loaded_modules("import machine")
+        self.assertEqual({x for x in modules if x.startswith("machine")}, {"machine", "machine.constants"})
+        for heavy in ["json", "typing", "hashlib", "concurrent.futures"]:
+            self.assertNotIn(heavy, modules)
+        modules = loaded_modules("import machine; machine.TM")
+        self.assertIn("machine.tm", modules)
+        self.assertNotIn("machine.dfa", modules)
+        self.assertNotIn("concurrent.futures", modules)
+        self.assertIn("machine.dfa", loaded_modules("import machine; machine.NFAlambda"))
+
+    def test_names(self):
+        import machine
+        self.assertIs(machine.TM, machine.tm.TM)
+        self.assertIn("NFAlambda", dir(machine))
+        with self.assertRaises(AttributeError):
+            machine.NoSuchMachine
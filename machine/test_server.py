@@ -0,0 +1,108 @@
+from unittest import TestCase
+import machine
+import asyncio
+import functools
+import json
+import os
+import shutil
+import tempfile
+
+
+def asynchronous(test):
+    """
+    runs a coroutine test in its own event loop
+    (IsolatedAsyncioTestCase needs Python 3.8)
+    """
+    @functools.wraps(test)
+    def wrapper(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(test(self))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+    return wrapper
+
+
+class TestMachineServer(TestCase):
+    @asynchronous
+    async def test_handle(self):
+        S = machine.MachineServer(workers=0)
+        tm = os.path.join("..", "configs", "ex_821.tm")
+        response = await S.handle({"id": 1, "machine": tm, "input": "abaa"})
+        self.assertEqual(response["id"], 1)
+        self.assertEqual(response["verdict"], machine.kVERDICT_ACCEPTED)
+        self.assertEqual(response["steps"], 5)
+        response = await S.handle({"machine": tm, "input": "abc"})
+        self.assertEqual(response["verdict"], machine.kVERDICT_INVALID)
+        response = await S.handle({"machine": os.path.join("..", "configs", "ex_ab.dfa"), "input": "aab"})
+        self.assertEqual(response["verdict"], machine.kVERDICT_ACCEPTED)
+        response = await S.handle({"machine": os.path.join("..", "configs", "ex_nfal.nfal"), "input": "b"})
+        self.assertEqual(response["verdict"], machine.kVERDICT_REJECTED)
+        response = await S.handle({"machine": os.path.join("..", "configs", "ex_loop.tm"), "max_steps": 1000})
+        self.assertEqual((response["verdict"], response["steps"]), (machine.kVERDICT_EXHAUSTED, 1000))
+        self.assertIn("error", await S.handle({"machine": os.path.join("..", "configs", "missing.tm")}))
+        self.assertIn("error", await S.handle({"op": "nothing"}))
+        stats = await S.handle({"op": "stats"})
+        self.assertEqual(stats["served"], 5)
+        hits = {os.path.basename(m["path"]): m["hits"] for m in stats["machines"]}
+        self.assertEqual(hits, {"ex_821.tm": 2, "ex_ab.dfa": 1, "ex_nfal.nfal": 1, "ex_loop.tm": 1})
+
+    @asynchronous
+    async def test_ntm_limits(self):
+        ntm = {"kind": "ntm", "machine": os.path.join("..", "configs", "ex_ntm.tm"), "input": "bbbbaa"}
+        # searched in the server and in a worker
+        for workers in [0, 1]:
+            S = machine.MachineServer(workers=workers)
+            try:
+                self.assertEqual((await S.handle(ntm))["verdict"], machine.kVERDICT_ACCEPTED)
+                self.assertEqual((await S.handle(dict(ntm, timeout=0)))["verdict"], machine.kVERDICT_EXHAUSTED)
+                self.assertIn("error", await S.handle(dict(ntm, max_cells=100)))
+            finally:
+                await S.close()
+            self.assertEqual(S.offloaded, 2 * workers)
+
+    @asynchronous
+    async def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "ex_821.tm")
+            shutil.copy(os.path.join("..", "configs", "ex_821.tm"), config)
+            S = machine.MachineServer(workers=0)
+            first = await S.handle({"op": "load", "machine": config})
+            self.assertEqual((await S.handle({"machine": config, "input": "aa"}))["verdict"],
+                             machine.kVERDICT_ACCEPTED)
+            with open(config, encoding="utf-8") as f:
+                changed = json.load(f)
+            changed["Accept"] = []
+            with open(config, "w", encoding="utf-8") as f:
+                json.dump(changed, f, ensure_ascii=False)
+            second = await S.handle({"op": "load", "machine": config})
+            self.assertNotEqual(first["digest"], second["digest"])
+            self.assertEqual(len(S.machines), 1)
+            self.assertEqual((await S.handle({"machine": config, "input": "aa"}))["verdict"],
+                             machine.kVERDICT_HALTED)
+
+    @asynchronous
+    async def test_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket = os.path.join(directory, "server.sock")
+            S = machine.MachineServer(workers=1, slice_steps=1000, offload_steps=50000)
+            await S.start(path=socket)
+            try:
+                reader, writer = await asyncio.open_unix_connection(socket, limit=machine.kSERVER_LINE_LIMIT)
+                long = {"id": "long", "machine": os.path.join("..", "configs", "ex_812.tm"), "input": "ab" * 100}
+                short = {"id": "short", "machine": os.path.join("..", "configs", "ex_821.tm"), "input": "aa"}
+                writer.write("{0}\n{1}\nnot json\n".format(json.dumps(long), json.dumps(short)).encode("utf-8"))
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(3)]
+                writer.close()
+            finally:
+                await S.close()
+        # the short run doesn't wait for the long one, which finishes in a worker
+        self.assertEqual([response["id"] for response in responses], ["short", None, "long"])
+        self.assertIn("error", responses[1])
+        self.assertEqual(S.offloaded, 1)
+        M = machine.TM(os.path.join("..", "configs", "ex_812.tm"))
+        M.load(machine.TMTape("ab" * 100))
+        self.assertEqual(responses[2], dict(M.run().as_dict(), id="long"))
@@ -0,0 +1,2097 @@
+import json
+import sys
+import os
+import collections
+import array
+import time
+import hashlib
+import mmap
+# collections.abc rather than typing, which is slow to import
+from collections.abc import Iterable, Iterator
+from .constants import *
+from .base import Machine, BadTMTransition, TMTransitionUndefined, TMLimitExceeded, TMLoopDetected, \
+    InvalidSnapshot, InvalidCharacterInTape, InvalidConfigBlock
+from .tape import TMTape, RLETape
+
+
+class TMTransition(collections.namedtuple("TMTransition", ["state", "character", "direction", "delta"])):
+    """
+    a transition of the D-Table: next state, the
+    character to write and the head direction, plus
+    the direction decoded to a head delta (None if
+    it is not a direction). Immutable, with no per
+    instance dict. On a multi-tape TM character,
+    direction and delta are tuples with one entry
+    per tape, written "q1, (a, b), (→, ←)"
+    """
+    __slots__ = ()
+
+    def __new__(cls, *args):
+        if len(args) == 3:
+            state, character, direction = args
+        elif len(args) == 1:
+            state, character, direction = cls.__parse(*args)
+        else:
+            raise BadTMTransition(*args)
+        if isinstance(direction, str):
+            delta = kDELTAS.get(direction)
+        else:
+            delta = tuple(kDELTAS.get(x) for x in direction)
+        return super().__new__(cls, state, character, direction, delta)
+
+    def __getnewargs__(self) -> tuple:
+        return self.state, self.character, self.direction
+
+    def __str__(self) -> str:
+        if isinstance(self.character, tuple):
+            return "{0}, ({1}), ({2})".format(self.state, ", ".join(self.character), ", ".join(self.direction))
+        return "{0}, {1}, {2}".format(self.state, self.character, self.direction)
+
+    @staticmethod
+    def __parse(string: str) -> tuple:
+        parts = [x.strip(" ") for x in string.split(",")]
+        if len(parts) < 3 or len(parts) % 2 == 0:
+            raise BadTMTransition(string)
+        if len(parts) == 3:
+            return tuple(parts)
+        tapes = (len(parts) - 1) // 2
+        characters = parts[1:tapes + 1]
+        directions = parts[tapes + 1:]
+        for group in (characters, directions):
+            if group[0].startswith("(") and group[-1].endswith(")"):
+                group[0] = group[0][1:].strip(" ")
+                group[-1] = group[-1][:-1].strip(" ")
+        return parts[0], tuple(characters), tuple(directions)
+
+
+class TM(Machine):
+    # a deterministic TM allows one transition per state and character
+    nondeterministic = False
+    # only a multi-tape TM can be configured with more than one tape
+    multitape = False
+    tapes = 1
+
+    def load(self, tape: "Tape") -> None:
+        """
+        loads a "tape" object into the machine
+        :param tape: tape containing string to be processed
+        :return:
+        """
+        used = tape.alphabet() if isinstance(tape, (TMTape, RLETape)) else set(str(tape))
+        if not used.issubset(self.tapealpha):
+            raise InvalidCharacterInTape(used.difference(self.tapealpha))
+        else:
+            super().load(tape)
+
+    def config(self, filepath: str, cache: bool = True) -> None:
+        """
+        configures the Turing Machine with a
+        given config file. Config files are
+        JSON formatted text files. The compiled
+        machine is cached in a .tmc file next to
+        the config and reused while the config's
+        contents stay the same
+        :param filepath: file name and path to the config file
+        :param cache: use and update the .tmc file
+        :return:
+        """
+        with open(filepath, "rb") as f:
+            source = f.read()
+        # the key covers the kind of machine, which changes the compiled table
+        digest = hashlib.sha256("{0:d}{1:d}".format(self.nondeterministic, self.multitape).encode()
+                                + source).digest()
+        compiled_path = os.path.splitext(filepath)[0] + kCOMPILED_EXT
+        if cache and self.__load_compiled(compiled_path, digest):
+            self.reset()
+            return
+        config = json.loads(source.decode("utf-8"))
+        self.states = set(config[kSTATES_PREFIX])
+        self.start = config[kSTART_PREFIX]
+        if not self.start in self.states:
+            raise InvalidConfigBlock("Start state not in states", self.start)
+        self.accept = set(config[kACCEPT_PREFIX])
+        if not self.accept.issubset(self.states):
+            raise InvalidConfigBlock("Accepting state not subset states", self.accept)
+        self.alpha = set(config[kALPHA_PREFIX])
+        self.tapealpha = set(config[kTAPEALPHA_PREFIX])
+        self.tapes = config.get(kTAPES_PREFIX, 1)
+        if self.tapes != 1 and not self.multitape:
+            raise InvalidConfigBlock("TM has a single tape", self.tapes)
+        if not isinstance(self.tapes, int) or self.tapes < 1:
+            raise InvalidConfigBlock("Tapes not a positive integer", self.tapes)
+        self.d_table = dict()
+        for state, row in config[kDTABLE_PREFIX].items():
+            if not state in self.states:
+                raise InvalidConfigBlock("D-Table state not in states", state)
+            self.d_table[state] = dict()
+            for char, entry in row.items():
+                entries = entry if isinstance(entry, list) else [entry]
+                if len(entries) != 1 and not self.nondeterministic:
+                    raise InvalidConfigBlock("TMTransition not deterministic", entry)
+                transitions = list()
+                for this_entry in entries:
+                    trans = TMTransition(this_entry)
+                    if not trans.state in self.states:
+                        raise InvalidConfigBlock("TMTransition not in states", trans.state)
+                    if len(self.__per_tape(trans.character)) != self.tapes:
+                        raise InvalidConfigBlock("TMTransition not one character per tape", this_entry)
+                    if not set(self.__per_tape(trans.character)).issubset(self.tapealpha):
+                        raise InvalidConfigBlock("TMTransition not in tapealpha", trans.character)
+                    if None in self.__per_tape(trans.delta):
+                        raise InvalidConfigBlock("TMTransition not in directions", trans.direction)
+                    transitions.append(trans)
+                if self.tapes > 1:
+                    # keys of a multi-tape d-table are the characters under every head, "a, b"
+                    char = tuple(x.strip(" ") for x in char.strip("()").split(","))
+                    if len(char) != self.tapes:
+                        raise InvalidConfigBlock("D-Table key not one character per tape", char)
+                if not set(self.__per_tape(char)).issubset(self.tapealpha):
+                    raise InvalidConfigBlock("D-Table key not in tapealpha", char)
+                self.d_table[state][char] = transitions if self.nondeterministic else transitions[0]
+        self.compile()
+        if cache:
+            self.__save_compiled(compiled_path, digest)
+        self.reset()
+
+    @property
+    def d_table(self) -> dict:
+        # a machine loaded from a .tmc file decodes its d-table when first needed
+        if self.__d_table is None:
+            self.__d_table = self.__decode_table()
+        return self.__d_table
+
+    @d_table.setter
+    def d_table(self, d_table: dict) -> None:
+        self.__d_table = d_table
+
+    def __save_compiled(self, filepath: str, digest: bytes) -> None:
+        """
+        writes the compiled machine to a .tmc file:
+        the magic number, the config digest, a JSON
+        header with the states and symbols, then the
+        table as native 32-bit integers. The table is
+        an offset per slot into a list of (next state,
+        symbols to write, head deltas) records, so a
+        slot holds any number of transitions. Failing
+        to write the file is not an error
+        :param filepath: path of the .tmc file
+        :param digest: digest of the config it was compiled from
+        :return:
+        """
+        header = json.dumps({kSTATES_PREFIX: self.state_list, kSTART_PREFIX: self.start,
+                             kACCEPT_PREFIX: sorted(self.accept), kALPHA_PREFIX: sorted(self.alpha),
+                             kTAPEALPHA_PREFIX: self.symbol_list, kTAPES_PREFIX: self.tapes,
+                             "byteorder": sys.byteorder}, ensure_ascii=False).encode("utf-8")
+        header += b" " * (-len(header) % 4)
+        offsets = array.array("i", [0])
+        records = array.array("i")
+        for entry in self.c_table:
+            if entry is not None:
+                for state, writes, deltas in (entry if self.nondeterministic else (entry,)):
+                    records.append(state)
+                    records.extend(writes if isinstance(writes, tuple) else (writes,))
+                    records.extend(deltas if isinstance(deltas, tuple) else (deltas,))
+            offsets.append(len(records))
+        temp_path = "{0}.{1}".format(filepath, os.getpid())
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(kCOMPILED_MAGIC + digest + len(header).to_bytes(4, "little") + header)
+                offsets.tofile(f)
+                records.tofile(f)
+            # replaced in one go, so concurrent readers never see half a file
+            os.replace(temp_path, filepath)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def __load_compiled(self, filepath: str, digest: bytes) -> bool:
+        """
+        configures the machine from a .tmc file
+        written by __save_compiled, mapping it into
+        memory rather than reading it
+        :param filepath: path of the .tmc file
+        :param digest: digest of the current config
+        :return: True if the file existed and matched the config
+        """
+        try:
+            with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as image:
+                prefix = len(kCOMPILED_MAGIC) + len(digest)
+                if image[:prefix] != kCOMPILED_MAGIC + digest:
+                    return False
+                size = int.from_bytes(image[prefix:prefix + 4], "little")
+                header = json.loads(image[prefix + 4:prefix + 4 + size].decode("utf-8"))
+                if header["byteorder"] != sys.byteorder:
+                    return False
+                slots = len(header[kSTATES_PREFIX]) * len(header[kTAPEALPHA_PREFIX]) ** header[kTAPES_PREFIX]
+                table = memoryview(image)[prefix + 4 + size:]
+                try:
+                    # a file cut short anywhere in the table is compiled again
+                    if len(table) % 4 or len(table) < 4 * (slots + 1):
+                        return False
+                    values = table.cast("i").tolist()
+                finally:
+                    table.release()
+                if len(values) != slots + 1 + values[slots]:
+                    return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.states = set(header[kSTATES_PREFIX])
+        self.start = header[kSTART_PREFIX]
+        self.accept = set(header[kACCEPT_PREFIX])
+        self.alpha = set(header[kALPHA_PREFIX])
+        self.tapealpha = set(header[kTAPEALPHA_PREFIX])
+        self.tapes = header[kTAPES_PREFIX]
+        self.state_list = header[kSTATES_PREFIX]
+        self.state_index = {state: i for i, state in enumerate(self.state_list)}
+        self.symbol_list = header[kTAPEALPHA_PREFIX]
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbol_list)}
+        offsets = values[:slots + 1]
+        records = values[slots + 1:]
+        size = 1 + 2 * self.tapes
+        wide = self.multitape
+        self.c_table = [None] * slots
+        for slot in range(slots):
+            entries = list()
+            for at in range(offsets[slot], offsets[slot + 1], size):
+                if wide:
+                    entries.append((records[at], tuple(records[at + 1:at + 1 + self.tapes]),
+                                    tuple(records[at + 1 + self.tapes:at + size])))
+                else:
+                    entries.append(tuple(records[at:at + size]))
+            if entries:
+                self.c_table[slot] = tuple(entries) if self.nondeterministic else entries[0]
+        self.c_accept = [state in self.accept for state in self.state_list]
+        self.macro_cache = dict()
+        self.d_table = None
+        return True
+
+    def __decode_table(self) -> dict:
+        """
+        rebuilds the d-table from the compiled table
+        :return: the d-table
+        """
+        directions = {delta: direction for direction, delta in kDELTAS.items()}
+        width = len(self.symbol_list)
+        stride = width ** self.tapes
+        d_table = dict()
+        for slot, entry in enumerate(self.c_table):
+            if entry is None:
+                continue
+            state, code = divmod(slot, stride)
+            chars = tuple(self.symbol_list[code // width ** i % width] for i in range(self.tapes))
+            transitions = list()
+            for next_state, writes, deltas in (entry if self.nondeterministic else (entry,)):
+                if self.tapes == 1:
+                    writes = writes[0] if isinstance(writes, tuple) else writes
+                    deltas = deltas[0] if isinstance(deltas, tuple) else deltas
+                    transitions.append(TMTransition(self.state_list[next_state], self.symbol_list[writes],
+                                                    directions[deltas]))
+                else:
+                    transitions.append(TMTransition(self.state_list[next_state],
+                                                    tuple(self.symbol_list[x] for x in writes),
+                                                    tuple(directions[x] for x in deltas)))
+            d_table.setdefault(self.state_list[state], dict())[chars if self.tapes > 1 else chars[0]] = \
+                transitions if self.nondeterministic else transitions[0]
+        return d_table
+
+    def compile(self) -> None:
+        """
+        compiles the d-table into an integer coded
+        form for use by run(). States and tape symbols
+        are numbered (the blank is always symbol 0) and
+        the transitions are laid out in a flat list
+        indexed by state * |tapealpha| + symbol. Each
+        entry is either None (no transition) or a tuple
+        of (next state, symbol to write, head delta); for
+        a nondeterministic TM, a tuple of those tuples
+        :return:
+        """
+        self.state_list = sorted(self.states)
+        self.state_index = {state: i for i, state in enumerate(self.state_list)}
+        self.symbol_list = [kBLANK] + sorted(self.tapealpha.difference({kBLANK}))
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbol_list)}
+        width = len(self.symbol_list)
+        self.c_table = [None] * (len(self.state_list) * width)
+        for state in self.d_table.keys():
+            for char in self.d_table[state].keys():
+                if state not in self.state_index or char not in self.symbol_index:
+                    # can never be reached, nothing to compile
+                    continue
+                compiled = tuple((self.state_index[trans.state], self.symbol_index[trans.character],
+                                  trans.delta) for trans in self.d_table[state][char]) \
+                    if self.nondeterministic else None
+                if compiled is None:
+                    trans = self.d_table[state][char]
+                    compiled = (self.state_index[trans.state], self.symbol_index[trans.character], trans.delta)
+                self.c_table[self.state_index[state] * width + self.symbol_index[char]] = compiled
+        self.c_accept = [state in self.accept for state in self.state_list]
+        self.macro_cache = dict()
+
+    @staticmethod
+    def __per_tape(value) -> tuple:
+        """
+        a transition's character or direction as a
+        tuple with one entry per tape
+        """
+        return value if isinstance(value, tuple) else (value,)
+
+    def __get_t(self, state: str, character: str) -> TMTransition:
+        """
+        lookup function for the TM delta table.
+        Returns a TMTransition dictating the
+        next state of the TM.
+        :param state: state to lookup
+        :param character: character to lookup
+        :return: the transition for this lookup
+        """
+        try:
+            trans = self.d_table[state][character]
+        except KeyError:
+            raise TMTransitionUndefined(state, character)
+        return trans
+
+    def get_c(self) -> str:
+        """
+        generates a configuration string for the
+        current state of the machine. Configuration
+        strings consist of the contents of the tape,
+        with the current state embedded at the position
+        of the head
+        :return: the configuration string
+        """
+        contents = str(self.loaded_tape)
+        ret_val = "{0}{1}{2}".format(contents[:self.current_position], \
+                                     str(self.current_state), \
+                                     contents[self.current_position:])
+        return ret_val
+
+    def step(self) -> str:
+        """
+        performs a single step of the TM's execution
+        returns a string detailing the resulting
+        configuration
+        :return: configuration string
+        """
+        self.__apply()
+        ret_val = "⊢{0}".format(self.get_c())
+        return ret_val
+
+    def __apply(self) -> None:
+        trans = self.__get_t(self.current_state, self.loaded_tape.read(self.current_position))
+        self.current_state = trans.state
+        self.loaded_tape.write(trans.character, self.current_position)
+        self.current_position += trans.delta
+        self.steps += 1
+
+    def is_accepted(self) -> bool:
+        """
+        checks whether the current state of the machine
+        is in an accepted state
+        :return:
+        """
+        return self.current_state in self.accept
+
+    def __gen_config(self) -> dict:
+        """
+        generates a configuration dictionary for output
+        either to file or to std out
+        :return: configuration dictionary
+        """
+        config = dict()
+        config[kSTATES_PREFIX] = list(self.states)
+        config[kSTATES_PREFIX].sort()
+        config[kSTART_PREFIX] = self.start
+        config[kACCEPT_PREFIX] = list(self.accept)
+        config[kACCEPT_PREFIX].sort()
+        config[kALPHA_PREFIX] = list(self.alpha)
+        config[kALPHA_PREFIX].sort()
+        config[kTAPEALPHA_PREFIX] = list(self.tapealpha)
+        config[kTAPEALPHA_PREFIX].sort()
+        if self.tapes != 1:
+            config[kTAPES_PREFIX] = self.tapes
+        config[kDTABLE_PREFIX] = collections.defaultdict(dict)
+        for state in self.d_table.keys():
+            for char in self.d_table[state].keys():
+                try:
+                    trans = self.__get_t(state, char)
+                    key = char if isinstance(char, str) else ", ".join(char)
+                    config[kDTABLE_PREFIX][state][key] = [str(x) for x in trans] \
+                        if self.nondeterministic and len(trans) > 1 else str(trans[0]) \
+                        if self.nondeterministic else str(trans)
+                except TMTransitionUndefined:
+                    pass
+        return config
+
+    def export(self, filepath: str) -> None:
+        """
+        writes the TMs configuration (states, alpha,
+        etc.) to a file.
+        :param filepath: file path and name
+        :return:
+        """
+        with open(filepath, "w+", encoding="utf-8") as f:
+            json.dump(self.__gen_config(), f, indent=4, sort_keys=True, ensure_ascii=False)
+
+    def exec(self) -> list:
+        """
+        performs an execution of the TM. TM
+        runs until it halts either from:
+        1. entering a final state
+        2. entering a configuration without
+        a exiting transition
+        the execution is traces, with each step
+        string being added in sequence. Finally,
+        the accepted state of the machine is
+        appended to the trace
+        :return: trace list
+        """
+        return list(self.iexec())
+
+    def iexec(self, max_steps: int = None, window: int = None) -> "Iterator[str]":
+        """
+        generator form of exec(). Yields each
+        configuration as soon as it is produced,
+        followed by the verdict, so a trace can be
+        consumed without keeping it in memory. The
+        configurations are rendered incrementally by
+        a ConfigRenderer
+        :param max_steps: stop with an Exhausted verdict after this many steps
+        :param window: only render this many cells either side of the head
+        :return: iterator over the trace
+        """
+        self.reset()
+        verdict = None
+        renderer = ConfigRenderer(self, window)
+        # initial config
+        yield renderer.render()
+        while True:
+            try:
+                if max_steps is not None and self.steps >= max_steps:
+                    # only exhausted if there is a step left to take
+                    self.__get_t(self.current_state, self.loaded_tape.read(self.current_position))
+                    verdict = kVERDICT_EXHAUSTED
+                    break
+                self.__apply()
+                yield "⊢{0}".format(renderer.render())
+                if self.is_accepted():
+                    break
+            except TMTransitionUndefined:
+                break
+        yield str(self.result(verdict=verdict))
+
+    def __align_tape(self) -> "TMTape":
+        """
+        makes sure the loaded tape uses the same
+        symbol codes as the compiled d-table
+        :return: the loaded tape
+        """
+        tape = self.loaded_tape
+        if not isinstance(tape, TMTape):
+            raise TypeError("needs a TMTape", type(tape))
+        if tape.symbols[:len(self.symbol_list)] != self.symbol_list:
+            tape.recode(self.symbol_list)
+        return tape
+
+    def advance(self, budget: int = sys.maxsize, max_cells: int = sys.maxsize,
+                detector: "LoopDetector" = None, record: array.array = None,
+                profile: "TMProfile" = None) -> bool:
+        """
+        continues the execution of the TM from its
+        current configuration using the compiled
+        d-table, for at most budget steps. The machine
+        halts under the same conditions as exec()
+        :param budget: maximum number of steps to take
+        :param max_cells: maximum number of cells the tape may span
+        :param detector: loop detector to check every configuration against
+        :param record: array to append every step to, packed as
+        (next state * |tapealpha| + symbol written) * 3 + head delta + 1
+        :param profile: profile to count every step in. The detector,
+        record and profile can be combined (TMTape only)
+        :return: True if the machine halted
+        """
+        if detector is not None or record is not None or profile is not None:
+            return self.__advance_instrumented(budget, max_cells, detector, record, profile)
+        if not isinstance(self.loaded_tape, TMTape):
+            return self.__advance_any(budget, max_cells)
+        table = self.c_table
+        accepting = self.c_accept
+        width = len(self.symbol_list)
+        tape = self.__align_tape()
+        cells = tape.cells
+        origin = tape.origin
+        # lo and hi track the written extent as indices into cells
+        lo = origin + tape.lo
+        hi = origin + tape.hi
+        pos = origin + self.current_position
+        state = self.state_index[self.current_state]
+        steps = 0
+        halted = False
+        exceeded = False
+        while True:
+            trans = table[state * width + cells[pos]]
+            if trans is None:
+                halted = True
+                break
+            if steps >= budget:
+                break
+            if pos < lo:
+                if hi - pos >= max_cells:
+                    exceeded = True
+                    break
+                lo = pos
+            elif pos > hi:
+                if pos - lo >= max_cells:
+                    exceeded = True
+                    break
+                hi = pos
+            state, cells[pos], delta = trans
+            pos += delta
+            steps += 1
+            if not 0 <= pos < len(cells):
+                tape.reserve(pos - origin)
+                shift = tape.origin - origin
+                origin += shift
+                pos += shift
+                lo += shift
+                hi += shift
+            if accepting[state]:
+                halted = True
+                break
+        tape.lo = lo - origin
+        tape.hi = hi - origin
+        self.current_state = self.state_list[state]
+        self.current_position = pos - origin
+        self.steps += steps
+        if exceeded:
+            raise TMLimitExceeded("tape cells", max_cells)
+        return halted
+
+    def __advance_any(self, budget: int, max_cells: int) -> bool:
+        """
+        the advance() loop for tapes other than
+        TMTape, such as RLETape, going through their
+        read() and write()
+        """
+        table = self.c_table
+        accepting = self.c_accept
+        width = len(self.symbol_list)
+        symbols = self.symbol_list
+        index = self.symbol_index
+        tape = self.loaded_tape
+        pos = self.current_position
+        state = self.state_index[self.current_state]
+        steps = 0
+        halted = False
+        exceeded = False
+        while True:
+            trans = table[state * width + index[tape.read(pos)]]
+            if trans is None:
+                halted = True
+                break
+            if steps >= budget:
+                break
+            if (pos < tape.lo and tape.hi - pos >= max_cells) or (pos > tape.hi and pos - tape.lo >= max_cells):
+                exceeded = True
+                break
+            state, symbol, delta = trans
+            tape.write(symbols[symbol], pos)
+            pos += delta
+            steps += 1
+            if accepting[state]:
+                halted = True
+                break
+        self.current_state = self.state_list[state]
+        self.current_position = pos
+        self.steps += steps
+        if exceeded:
+            raise TMLimitExceeded("tape cells", max_cells)
+        return halted
+
+    def __advance_instrumented(self, budget: int, max_cells: int, detector: "LoopDetector",
+                               record: array.array, profile: "TMProfile") -> bool:
+        """
+        the advance() loop with every step reported to
+        any of a loop detector, a record and a profile
+        """
+        table = self.c_table
+        accepting = self.c_accept
+        width = len(self.symbol_list)
+        append = None
+        if record is not None:
+            packed = [None if trans is None else (trans[0] * width + trans[1]) * 3 + trans[2] + 1 for trans in table]
+            append = record.append
+        hits = None
+        if profile is not None:
+            profile.attach(self)
+            hits = profile.hits
+        tape = self.__align_tape()
+        cells = tape.cells
+        origin = tape.origin
+        lo = origin + tape.lo
+        hi = origin + tape.hi
+        pos = origin + self.current_position
+        state = self.state_index[self.current_state]
+        left = pos if profile is None or profile.left is None else min(pos, origin + profile.left)
+        right = pos if profile is None or profile.right is None else max(pos, origin + profile.right)
+        heading = 0 if profile is None else profile.heading
+        reversals = 0
+        steps = 0
+        halted = False
+        exceeded = False
+        looping = False
+        while True:
+            key = state * width + cells[pos]
+            trans = table[key]
+            if trans is None:
+                halted = True
+                break
+            if steps >= budget:
+                break
+            if pos < lo:
+                if hi - pos >= max_cells:
+                    exceeded = True
+                    break
+                lo = pos
+            elif pos > hi:
+                if pos - lo >= max_cells:
+                    exceeded = True
+                    break
+                hi = pos
+            if append is not None:
+                append(packed[key])
+            if hits is not None:
+                hits[key] += 1
+            state, symbol, delta = trans
+            if symbol != cells[pos]:
+                if detector is not None:
+                    detector.write(pos - origin, cells[pos], symbol)
+                cells[pos] = symbol
+            if delta:
+                if delta != heading:
+                    reversals += heading != 0
+                    heading = delta
+                pos += delta
+                if pos < left:
+                    left = pos
+                elif pos > right:
+                    right = pos
+            steps += 1
+            if not 0 <= pos < len(cells):
+                tape.reserve(pos - origin)
+                shift = tape.origin - origin
+                origin += shift
+                pos += shift
+                lo += shift
+                hi += shift
+                left += shift
+                right += shift
+            if accepting[state]:
+                halted = True
+                break
+            if detector is not None and detector.observe(state, pos - origin, cells, lo - origin, hi - origin, origin):
+                looping = True
+                break
+        tape.lo = lo - origin
+        tape.hi = hi - origin
+        self.current_state = self.state_list[state]
+        self.current_position = pos - origin
+        self.steps += steps
+        if profile is not None:
+            profile.steps += steps
+            profile.left = left - origin
+            profile.right = right - origin
+            profile.heading = heading
+            profile.reversals += reversals
+        if exceeded:
+            raise TMLimitExceeded("tape cells", max_cells)
+        if looping:
+            raise TMLoopDetected(self.current_state, self.current_position, detector.period)
+        return halted
+
+    def run(self, trace: int = kTRACE_NONE, max_steps: int = None, max_cells: int = None,
+            timeout: float = None, detect_loops: bool = False, resume: bool = False,
+            checkpoint: str = None, checkpoint_steps: int = None,
+            checkpoint_seconds: float = None, window: int = None,
+            profile: "TMProfile" = None) -> "TMResult":
+        """
+        performs an execution of the TM using the
+        compiled d-table. The machine halts under the
+        same conditions as exec(), but by default no
+        trace is kept. Afterwards the machine and the
+        loaded tape are left in their final configuration.
+        Runs that hit a limit end with an Exhausted
+        verdict, and runs that repeat a configuration
+        (if detect_loops is set) end with a Looping verdict
+        :param trace: kTRACE_NONE for no trace, kTRACE_FULL for
+        every configuration (as exec() without the verdict) or
+        k to record every k-th configuration and the final one
+        :param max_steps: maximum number of steps to take
+        :param max_cells: maximum number of cells the tape may span
+        :param timeout: maximum wall-clock time in seconds
+        :param detect_loops: check for repeated configurations (TMTape only)
+        :param resume: continue from the current configuration, such as one
+        restored from a snapshot, instead of starting over. max_steps still
+        counts from the start of the run
+        :param checkpoint: snapshot file to write the configuration to
+        periodically and when the run ends
+        :param checkpoint_steps: steps between snapshots
+        :param checkpoint_seconds: seconds between snapshots, the default
+        is kCHECKPOINT_SECONDS if neither is given
+        :param window: only render this many cells either side of the head in the trace
+        :param profile: profile to count the steps and time the phases of the
+        run in (TMTape only)
+        :return: the result of the execution
+        """
+        phases = _Unprofiled() if profile is None else profile
+        if not resume:
+            self.reset()
+        renderer = None if trace == kTRACE_NONE else ConfigRenderer(self, window)
+        configs = None if renderer is None else [renderer.render()]
+        if resume and self.is_accepted():
+            # advance() would take the state's next transition, so a run
+            # resumed from its final snapshot stops where it was accepted
+            return self.result(configs)
+        chunk = kRUN_CHUNK if configs is None else trace
+        max_steps = sys.maxsize if max_steps is None else max_steps
+        max_cells = sys.maxsize if max_cells is None else max_cells
+        deadline = None if timeout is None else time.monotonic() + timeout
+        detector = LoopDetector(self.__align_tape()) if detect_loops else None
+        if checkpoint is not None and checkpoint_steps is None and checkpoint_seconds is None:
+            checkpoint_seconds = kCHECKPOINT_SECONDS
+        next_steps = sys.maxsize if checkpoint_steps is None else self.steps + checkpoint_steps
+        next_time = None if checkpoint_seconds is None else time.monotonic() + checkpoint_seconds
+        verdict = None
+        halted = False
+        try:
+            while not halted:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TMLimitExceeded("timeout", timeout)
+                budget = min(chunk, max_steps - self.steps)
+                if configs is None:
+                    # stop on the checkpoint step, a trace keeps its own chunks
+                    budget = min(budget, max(next_steps - self.steps, 1))
+                before = self.steps
+                with phases.phase("step"):
+                    halted = self.advance(budget, max_cells, detector, profile=profile)
+                if configs is not None and self.steps != before:
+                    with phases.phase("render"):
+                        configs.append("⊢{0}".format(renderer.render()))
+                if checkpoint is not None and not halted and \
+                        (self.steps >= next_steps or (next_time is not None and time.monotonic() >= next_time)):
+                    with phases.phase("checkpoint"):
+                        self.checkpoint(checkpoint)
+                    next_steps = sys.maxsize if checkpoint_steps is None else self.steps + checkpoint_steps
+                    next_time = None if checkpoint_seconds is None else time.monotonic() + checkpoint_seconds
+                if not halted and self.steps >= max_steps:
+                    raise TMLimitExceeded("steps", max_steps)
+        except TMLimitExceeded:
+            verdict = kVERDICT_EXHAUSTED
+        except TMLoopDetected:
+            verdict = kVERDICT_LOOPING
+        if checkpoint is not None:
+            with phases.phase("checkpoint"):
+                self.checkpoint(checkpoint)
+        return self.result(configs, verdict)
+
+    def record(self, filepath: str, max_steps: int = None, max_cells: int = None,
+               keyframe_steps: int = kTRACE_KEYFRAME) -> "TMResult":
+        """
+        runs the TM like run(), writing its trace to
+        a file as one packed integer per step rather
+        than a configuration string, with a full
+        keyframe of the configuration every
+        keyframe_steps steps. Read it back with
+        TraceReader (TMTape only)
+        :param filepath: path of the trace file
+        :param max_steps: maximum number of steps to take
+        :param max_cells: maximum number of cells the tape may span
+        :param keyframe_steps: steps between keyframes
+        :return: the result of the execution
+        """
+        from .trace import TraceWriter
+
+        if self.multitape:
+            raise TypeError("traces record a single tape")
+        self.reset()
+        max_steps = sys.maxsize if max_steps is None else max_steps
+        max_cells = sys.maxsize if max_cells is None else max_cells
+        verdict = None
+        halted = False
+        with TraceWriter(filepath, self) as writer:
+            try:
+                while not halted:
+                    record = writer.keyframe()
+                    halted = self.advance(min(keyframe_steps, max_steps - self.steps), max_cells, record=record)
+                    if not halted and self.steps >= max_steps:
+                        raise TMLimitExceeded("steps", max_steps)
+            except TMLimitExceeded:
+                verdict = kVERDICT_EXHAUSTED
+            result = self.result(verdict=verdict)
+            writer.finish(result)
+        return result
+
+    def __fingerprint(self) -> str:
+        """
+        digest of the compiled machine, so a snapshot
+        is only restored into the machine that took it
+        :return: hex digest
+        """
+        return hashlib.sha256(json.dumps([self.state_list, self.symbol_list, self.c_table],
+                                         ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def checkpoint(self, filepath: str) -> None:
+        """
+        writes the configuration of the machine, its
+        state, step count, head positions and the
+        written part of every tape, to a snapshot file.
+        The file is the magic number, the length of a
+        JSON header, the header, then the cells of the
+        tapes compressed with zlib. It is replaced in
+        one go, so a crash while writing leaves the
+        previous snapshot intact
+        :param filepath: path of the snapshot file
+        :return:
+        """
+        import zlib
+
+        tapes = self.loaded_tapes if self.multitape else [self.loaded_tape]
+        positions = self.current_positions if self.multitape else [self.current_position]
+        header = {"machine": self.__fingerprint(), "state": self.current_state, "steps": self.steps,
+                  "positions": list(positions), "tapes": list()}
+        cells = list()
+        for tape in tapes:
+            if not isinstance(tape, TMTape):
+                raise TypeError("needs a TMTape", type(tape))
+            written = tape.cells[tape.origin + tape.lo:tape.origin + tape.hi + 1]
+            header["tapes"].append({"symbols": tape.symbols, "lo": tape.lo, "hi": tape.hi,
+                                    "wide": not isinstance(written, bytearray)})
+            cells.append(bytes(written) if isinstance(written, bytearray) else written.tobytes())
+        header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        temp_path = "{0}.{1}".format(filepath, os.getpid())
+        with open(temp_path, "wb") as f:
+            f.write(kSNAPSHOT_MAGIC + len(header).to_bytes(4, "little") + header)
+            f.write(zlib.compress(b"".join(cells)))
+        os.replace(temp_path, filepath)
+
+    def restore(self, filepath: str) -> None:
+        """
+        loads the tapes and configuration saved by
+        checkpoint(). Continue the run with
+        run(resume=True)
+        :param filepath: path of the snapshot file
+        :return:
+        """
+        import zlib
+
+        with open(filepath, "rb") as f:
+            image = f.read()
+        if image[:len(kSNAPSHOT_MAGIC)] != kSNAPSHOT_MAGIC:
+            raise InvalidSnapshot("not a snapshot", filepath)
+        start = len(kSNAPSHOT_MAGIC) + 4
+        size = int.from_bytes(image[len(kSNAPSHOT_MAGIC):start], "little")
+        header = json.loads(image[start:start + size].decode("utf-8"))
+        if header["machine"] != self.__fingerprint():
+            raise InvalidSnapshot("snapshot of a different machine", filepath)
+        cells = zlib.decompress(image[start + size:])
+        tapes = list()
+        at = 0
+        for saved in header["tapes"]:
+            count = saved["hi"] - saved["lo"] + 1
+            tape = TMTape("")
+            tape.symbols = saved["symbols"]
+            tape.codes = {symbol: i for i, symbol in enumerate(tape.symbols)}
+            if saved["wide"]:
+                tape.cells = array.array("H")
+                tape.cells.frombytes(cells[at:at + 2 * count])
+                at += 2 * count
+            else:
+                tape.cells = bytearray(cells[at:at + count])
+                at += count
+            tape.origin = -saved["lo"]
+            tape.lo = saved["lo"]
+            tape.hi = saved["hi"]
+            # the head may be past the written cells
+            tape.reserve(header["positions"][len(tapes)])
+            tapes.append(tape)
+        self.load(*tapes)
+        self.current_state = header["state"]
+        self.steps = header["steps"]
+        if self.multitape:
+            self.current_positions = header["positions"]
+        else:
+            self.current_position = header["positions"][0]
+
+    def result(self, trace: list = None, verdict: str = None) -> "TMResult":
+        """
+        summarizes the current configuration of the
+        TM as an execution result
+        :param trace: trace to attach to the result
+        :param verdict: verdict to report instead of the halting one
+        :return: the result
+        """
+        if verdict is not None:
+            pass
+        elif self.is_accepted() and self.accept != set():
+            verdict = kVERDICT_ACCEPTED
+        elif self.accept != set():
+            verdict = kVERDICT_REJECTED
+        else:
+            verdict = kVERDICT_HALTED
+        return TMResult(verdict, self.steps, self.current_state, self.current_position,
+                        str(self.loaded_tape), trace)
+
+    def run_batch(self, inputs: "Iterable[str]", workers: int = None, chunksize: int = kBATCH_CHUNK,
+                  **limits) -> "Iterator[TMResult]":
+        """
+        runs the TM on many input strings in a pool
+        of worker processes. The machine is sent to
+        each worker once, inputs are handed out in
+        chunks and the results come back in input
+        order as soon as they are ready. Inputs with
+        characters outside the tape alphabet get an
+        Invalid verdict
+        :param inputs: input strings
+        :param workers: number of processes, defaults to the cpu count
+        :param chunksize: inputs per task
+        :param limits: max_steps, max_cells, timeout and detect_loops for run()
+        :return: iterator over the results
+        """
+        # only batch runs need the process pool machinery
+        import concurrent.futures
+
+        workers = workers or os.cpu_count()
+        pending = collections.deque()
+        if sys.version_info < (3, 7):
+            # no pool initializer before Python 3.7, so every chunk carries the machine
+            pool = concurrent.futures.ProcessPoolExecutor(workers)
+            shipped = (self, limits)
+        else:
+            pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=_batch_init, initargs=(self, limits))
+            shipped = ()
+        with pool:
+            for chunk in _chunks(inputs, chunksize):
+                pending.append(pool.submit(_batch_run, chunk, *shipped))
+                # keep a bounded number of chunks in flight
+                if len(pending) > 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def run_lockstep(self, inputs: list, max_steps: int = None) -> list:
+        """
+        runs the TM on many input strings at once,
+        moving every tape one step per iteration with
+        NumPy. All tapes are rows of one padded matrix
+        and each iteration is a gather from the compiled
+        d-table followed by scatter writes; halted tapes
+        drop out of the active set. Best suited to many
+        short inputs. Requires NumPy
+        :param inputs: input strings
+        :param max_steps: per-input step limit, Exhausted beyond it
+        :return: list of results in input order
+        """
+        import numpy
+
+        width = len(self.symbol_list)
+        size = len(self.state_list) * width
+        defined = numpy.zeros(size, dtype=bool)
+        next_state = numpy.zeros(size, dtype=numpy.int64)
+        write = numpy.zeros(size, dtype=numpy.int64)
+        delta = numpy.zeros(size, dtype=numpy.int64)
+        for i, trans in enumerate(self.c_table):
+            if trans is not None:
+                defined[i] = True
+                next_state[i], write[i], delta[i] = trans
+        accepting = numpy.array(self.c_accept, dtype=bool)
+
+        count = len(inputs)
+        lengths = numpy.fromiter(map(len, inputs), dtype=numpy.int64, count=count)
+        longest = int(lengths.max()) if count else 0
+        # every input as one array of code points, coded by looking them up
+        # among the sorted code points of the tape alphabet
+        points = numpy.frombuffer("".join(inputs).encode("utf-32-le"), dtype=numpy.uint32)
+        alphabet = sorted(self.tapealpha) if kBLANK in self.tapealpha else []
+        keys = numpy.array([ord(x) for x in alphabet], dtype=numpy.uint32)
+        codes = numpy.array([self.symbol_index[x] for x in alphabet], dtype=numpy.int64)
+        found = numpy.minimum(numpy.searchsorted(keys, points), max(len(keys) - 1, 0))
+        known = keys[found] == points if len(keys) else numpy.zeros(len(points), dtype=bool)
+        rows = numpy.repeat(numpy.arange(count), lengths)
+        valid = numpy.ones(count, dtype=bool)
+        valid[rows[~known]] = False
+        # every tape starts as blank, input, blank with room on either side
+        origin = longest + 2
+        tapes = numpy.zeros((count, 2 * origin + longest + 2), dtype=numpy.uint8 if width <= 256 else numpy.uint16)
+        columns = origin + 1 + numpy.arange(len(points)) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        keep = valid[rows]
+        tapes[rows[keep], columns[keep]] = codes[found[keep]]
+        lo = numpy.full(count, origin, dtype=numpy.int64)
+        hi = origin + lengths + 1
+        pos = numpy.full(count, origin, dtype=numpy.int64)
+        state = numpy.full(count, self.state_index[self.start], dtype=numpy.int64)
+        steps = numpy.zeros(count, dtype=numpy.int64)
+        active = numpy.flatnonzero(valid)
+        limit = sys.maxsize if max_steps is None else max_steps
+
+        taken = 0
+        while active.size:
+            t = state[active] * width + tapes[active, pos[active]]
+            moving = defined[t]
+            active, t = active[moving], t[moving]
+            if taken >= limit or not active.size:
+                break
+            at = pos[active]
+            lo[active] = numpy.minimum(lo[active], at)
+            hi[active] = numpy.maximum(hi[active], at)
+            tapes[active, at] = write[t]
+            state[active] = next_state[t]
+            pos[active] = at + delta[t]
+            steps[active] += 1
+            taken += 1
+            active = active[~accepting[state[active]]]
+            # grow the matrix when a head reaches either edge
+            if active.size and (pos[active].min() < 0 or pos[active].max() >= tapes.shape[1]):
+                grow = tapes.shape[1]
+                tapes = numpy.pad(tapes, ((0, 0), (grow, grow)))
+                origin += grow
+                lo += grow
+                hi += grow
+                pos += grow
+
+        # the results come straight from the final arrays, rendering each tape
+        # as TMTape does: the cells from lo to hi, with a blank added after
+        # the last cell and before cell -1 when they aren't blank
+        exhausted = numpy.zeros(count, dtype=bool)
+        exhausted[active] = True
+        if self.accept:
+            halting = numpy.where(accepting[state], kVERDICT_ACCEPTED, kVERDICT_REJECTED)
+        else:
+            halting = numpy.full(count, kVERDICT_HALTED)
+        verdicts = numpy.where(exhausted, kVERDICT_EXHAUSTED, halting).tolist()
+        every = numpy.arange(count)
+        before = (lo < origin) & (tapes[every, origin - 1] != 0)
+        after = tapes[every, hi] != 0
+        symbols = numpy.array(self.symbol_list)
+        if symbols.dtype.itemsize == 4:
+            # one character per symbol, so each row reads as a single string
+            cells = symbols[tapes].view("<U{0}".format(tapes.shape[1])).ravel().tolist()
+        else:
+            cells = ["".join(row) for row in symbols[tapes].tolist()]
+        names = self.state_list
+        results = list()
+        for w, ok, verdict, steps_taken, final, at, cell, first, last, pad_before, pad_after in zip(
+                inputs, valid.tolist(), verdicts, steps.tolist(), state.tolist(), (pos - origin).tolist(), cells,
+                lo.tolist(), (hi + 1).tolist(), before.tolist(), after.tolist()):
+            if not ok:
+                results.append(TMResult(kVERDICT_INVALID, 0, None, 0, w))
+                continue
+            results.append(TMResult(verdict, steps_taken, names[final], at, "{0}{1}{2}".format(
+                kBLANK if pad_before else "", cell[first:last], kBLANK if pad_after else "")))
+        return results
+
+    def run_macro(self, block: int = kMACRO_BLOCK, max_steps: int = None) -> "TMResult":
+        """
+        performs an execution of the TM as a macro
+        machine. The tape is cut into blocks of
+        block cells and kept as runs of identical
+        blocks either side of the head. Running the
+        TM across one block, from entering it to
+        leaving it, is worked out once and cached per
+        (state, block, entry side). When that leaves a
+        block in the same state it entered, in the
+        direction of travel, the head crosses the whole
+        run of identical blocks in one jump. Step counts,
+        final state, head position and tape are exactly
+        those of run(). Sweeping forever into blank
+        tape, or repeating a configuration within a
+        block, ends with a Looping verdict unless
+        max_steps is given, in which case the run ends
+        Exhausted at max_steps as run() does; other
+        machines that never halt need max_steps
+        :param block: number of cells per block
+        :param max_steps: maximum number of steps to take
+        :return: the result of the execution
+        """
+        self.reset()
+        tape = self.__align_tape()
+        limit = sys.maxsize if max_steps is None else max_steps
+        blank = (0,) * block
+        # the current block, and runs of [block, count] to its left and right,
+        # nearest run last
+        first = tape.lo // block
+        last = tape.hi // block
+        blocks = [tuple(tape.cells[tape.origin + i] if tape.lo <= i <= tape.hi else 0
+                        for i in range(b * block, (b + 1) * block)) for b in range(first, last + 1)]
+        left = list()
+        right = list()
+        for contents in blocks[:-first]:
+            self.__push_run(left, contents, 1)
+        for contents in reversed(blocks[1 - first:]):
+            self.__push_run(right, contents, 1)
+        index = 0
+        current = blocks[-first]
+        offset = 0
+        state = self.state_index[self.start]
+        lo, hi = tape.lo, tape.hi
+        verdict = None
+        while True:
+            macro = self.__macro(state, current, offset, block, None if max_steps is None else limit - self.steps)
+            next_state, contents, exit, end, steps, wlo, whi, stop, _ = macro
+            if wlo is not None:
+                lo = min(lo, index * block + wlo)
+                hi = max(hi, index * block + whi)
+            self.steps += steps
+            state, current = next_state, contents
+            if exit == 0:
+                offset = end
+                verdict = stop
+                break
+            # leave the block and take the next one off the run we are entering
+            self.__push_run(left if exit > 0 else right, current, 1)
+            ahead = right if exit > 0 else left
+            index += exit
+            offset = 0 if exit > 0 else block - 1
+            count = ahead[-1][1] if ahead else None
+            current = ahead[-1][0] if ahead else blank
+            skip = self.__macro(state, current, offset, block, None)
+            if skip[0] == state and skip[2] == exit:
+                # every block of this run takes the same path, cross them all
+                if count is None and max_steps is None:
+                    verdict = kVERDICT_LOOPING
+                    self.__pop_run(ahead, 1)
+                    break
+                n = (limit - self.steps) // skip[4] if skip[4] else 0
+                n = n if count is None else min(n, count)
+                if n > 0:
+                    first_block, last_block = (index, index + n - 1) if exit > 0 else (index - n + 1, index)
+                    lo = min(lo, first_block * block + skip[5])
+                    hi = max(hi, last_block * block + skip[6])
+                    self.steps += n * skip[4]
+                    self.__pop_run(ahead, n)
+                    self.__push_run(left if exit > 0 else right, skip[1], n)
+                    index += n * exit
+                    count = ahead[-1][1] if ahead else None
+                    current = ahead[-1][0] if ahead else blank
+            self.__pop_run(ahead, 1)
+
+        # lay the blocks back out on the tape
+        start = index - sum(count for contents, count in left)
+        cells = bytearray() if len(self.symbol_list) <= 256 else array.array("H")
+        for contents, count in left:
+            cells.extend(contents * count if isinstance(cells, bytearray) else array.array("H", contents * count))
+        for run in [(current, 1)] + right[::-1]:
+            contents, count = run
+            cells.extend(contents * count if isinstance(cells, bytearray) else array.array("H", contents * count))
+        tape.cells = cells
+        tape.origin = -start * block
+        tape.lo, tape.hi = lo, hi
+        self.current_state = self.state_list[state]
+        self.current_position = index * block + offset
+        return self.result(verdict=verdict)
+
+    @staticmethod
+    def __push_run(runs: list, contents: tuple, count: int) -> None:
+        if runs and runs[-1][0] == contents:
+            runs[-1][1] += count
+        else:
+            runs.append([contents, count])
+
+    @staticmethod
+    def __pop_run(runs: list, count: int) -> None:
+        if runs:
+            runs[-1][1] -= count
+            if runs[-1][1] == 0:
+                runs.pop()
+
+    def __macro(self, state: int, contents: tuple, offset: int, block: int, budget: int) -> tuple:
+        """
+        runs the TM within one block until the head
+        leaves it or the machine stops. Results for
+        entering a block from either side are cached.
+        With a budget, a configuration repeating within
+        the block is followed around its cycle up to the
+        budget rather than reported as a loop
+        :param budget: maximum number of steps, None for no limit
+        :return: (state, block, exit direction or 0 if stopped,
+        head offset, steps, lowest and highest offsets written,
+        verdict if stopped by something other than halting,
+        step the repeated configuration was first seen at if looping)
+        """
+        key = (block, state, contents, offset)
+        macro = self.macro_cache.get(key)
+        if macro is None:
+            macro = self.__simulate_block(state, contents, offset, block, None)
+            if offset in (0, block - 1):
+                self.macro_cache[key] = macro
+        if budget is None:
+            return macro
+        if macro[4] > budget:
+            return self.__simulate_block(state, contents, offset, block, budget)
+        if macro[7] == kVERDICT_LOOPING:
+            # the configuration after budget steps is the one as far into the cycle
+            start = macro[8]
+            cycled = self.__simulate_block(state, contents, offset, block,
+                                           start + (budget - start) % (macro[4] - start))
+            return cycled[:4] + (budget, macro[5], macro[6], kVERDICT_EXHAUSTED, None)
+        return macro
+
+    def __simulate_block(self, state: int, contents: tuple, offset: int, block: int, budget: int) -> tuple:
+        table = self.c_table
+        accepting = self.c_accept
+        width = len(self.symbol_list)
+        cells = list(contents)
+        steps = 0
+        wlo = whi = None
+        # configuration -> step it was seen at, only looked for without a budget
+        seen = dict()
+        while True:
+            trans = table[state * width + cells[offset]]
+            if trans is None:
+                return state, tuple(cells), 0, offset, steps, wlo, whi, None, None
+            if budget is None:
+                configuration = (state, offset, tuple(cells))
+                if configuration in seen:
+                    return state, tuple(cells), 0, offset, steps, wlo, whi, kVERDICT_LOOPING, seen[configuration]
+                seen[configuration] = steps
+            elif steps >= budget:
+                return state, tuple(cells), 0, offset, steps, wlo, whi, kVERDICT_EXHAUSTED, None
+            wlo = offset if wlo is None else min(wlo, offset)
+            whi = offset if whi is None else max(whi, offset)
+            state, cells[offset], delta = trans
+            offset += delta
+            steps += 1
+            if accepting[state]:
+                return state, tuple(cells), 0, offset, steps, wlo, whi, None, None
+            if not 0 <= offset < block:
+                return state, tuple(cells), delta, offset, steps, wlo, whi, None, None
+
+    def reset(self) -> None:
+        self.current_state = self.start
+        self.current_position = 0
+        self.steps = 0
+
+    def __init__(self, filepath=None):
+        """
+        instantiates a member of the TM class
+        :param filepath: file path and name
+        """
+        self.current_state = None
+        self.current_position = 0
+        self.steps = 0
+        self.loaded_tape = None
+        if filepath:
+            self.config(filepath)
+
+    def dumps(self) -> str:
+        """
+        dumps the configuration of the TM to a
+        JSON formatted string
+        :return: json config
+        """
+        return json.dumps(self.__gen_config(), indent=4, sort_keys=True, ensure_ascii=False)
+
+
+class ConfigRenderer:
+    """
+    renders the configuration strings of a TM, as
+    get_c() does, without redrawing whole tapes. The
+    rendered tapes are kept between calls, and since
+    a head writes only under itself and moves at most
+    one cell per step, only the cells within that many
+    steps of where the head was last time are redrawn.
+    A tape is drawn in full again only when its extent
+    or the blank padding at its ends changes. Writes to
+    the tapes other than by the machine's own steps
+    are not noticed. With a window, only the cells
+    from head - window to head + window are rendered,
+    with the state before the head's cell
+    """
+
+    def __init__(self, tm: TM, window: int = None):
+        self.tm = tm
+        self.window = window
+        self.tapes = list()
+        self.rendered = list()
+        self.shapes = list()
+        self.positions = list()
+        self.steps = 0
+
+    def render(self) -> str:
+        """
+        renders the TM's current configuration
+        :return: the configuration string
+        """
+        tm = self.tm
+        tapes = tm.loaded_tapes if tm.multitape else [tm.loaded_tape]
+        positions = list(tm.current_positions) if tm.multitape else [tm.current_position]
+        state = str(tm.current_state)
+        if self.window is not None:
+            configs = list()
+            for tape, position in zip(tapes, positions):
+                cells = "".join(map(tape.read, range(position - self.window, position + self.window + 1)))
+                configs.append("{0}{1}{2}".format(cells[:self.window], state, cells[self.window:]))
+            return kTAPE_SEPARATOR.join(configs)
+        # how far any head can have got from where it was last time
+        reach = tm.steps - self.steps
+        if reach < 0 or len(self.tapes) != len(tapes):
+            self.tapes = [None] * len(tapes)
+            self.rendered = [None] * len(tapes)
+            self.shapes = [None] * len(tapes)
+        configs = list()
+        for i, (tape, position) in enumerate(zip(tapes, positions)):
+            shape = (tape.lo, tape.hi, tape.lo < 0 and tape.read(-1) != kBLANK, tape.read(tape.hi) != kBLANK)
+            if self.tapes[i] is not tape or self.shapes[i] != shape:
+                self.rendered[i] = str(tape)
+            else:
+                # position p is at index p - lo, after a blank added in front when cell -1 isn't one
+                offset = shape[2] - tape.lo
+                lo = max(self.positions[i] - reach, tape.lo)
+                hi = min(self.positions[i] + reach, tape.hi)
+                if lo <= hi:
+                    rendered = self.rendered[i]
+                    self.rendered[i] = "{0}{1}{2}".format(rendered[:lo + offset],
+                                                          "".join(map(tape.read, range(lo, hi + 1))),
+                                                          rendered[hi + offset + 1:])
+            self.tapes[i] = tape
+            self.shapes[i] = shape
+            rendered = self.rendered[i]
+            configs.append("{0}{1}{2}".format(rendered[:position], state, rendered[position:]))
+        self.positions = positions
+        self.steps = tm.steps
+        return kTAPE_SEPARATOR.join(configs)
+
+
+class LoopDetector:
+    """
+    Brent's cycle detection over TM configurations.
+    The tape is summarized by a polynomial hash that
+    is updated on every write, so each configuration
+    is checked in O(1). A hash match is confirmed
+    against a saved copy of the tape before a loop
+    is reported
+    """
+    kBASE = 1000003
+    kMODULUS = (1 << 61) - 1
+    # weight of position -1, as pow() only takes negative exponents from Python 3.8
+    kINVERSE = pow(kBASE, kMODULUS - 2, kMODULUS)
+
+    def __init__(self, tape: "TMTape"):
+        self.digest = 0
+        for position in range(tape.lo, tape.hi + 1):
+            self.write(position, 0, tape.cells[tape.origin + position])
+        self.power = 1
+        self.length = 0
+        self.period = None
+        self.saved = None
+        self.saved_tape = None
+
+    def write(self, position: int, old: int, new: int) -> None:
+        """
+        updates the hash for a symbol change
+        :param position: tape position written
+        :param old: previous symbol code
+        :param new: new symbol code
+        :return:
+        """
+        if position >= 0:
+            weight = pow(self.kBASE, position, self.kMODULUS)
+        else:
+            weight = pow(self.kINVERSE, -position, self.kMODULUS)
+        self.digest = (self.digest + (new - old) * weight) % self.kMODULUS
+
+    def observe(self, state: int, position: int, cells, lo: int, hi: int, origin: int) -> bool:
+        """
+        checks a configuration against the one saved
+        by Brent's algorithm
+        :param state: state code
+        :param position: head position
+        :param cells: tape cells
+        :param lo: leftmost tape position
+        :param hi: rightmost tape position
+        :param origin: index of position 0 in cells
+        :return: True if the configuration repeats the saved one
+        """
+        key = (state, position, self.digest)
+        self.length += 1
+        if key == self.saved and self.__snapshot(cells, lo, hi, origin) == self.saved_tape:
+            self.period = self.length
+            return True
+        if self.length == self.power:
+            self.saved = key
+            self.saved_tape = self.__snapshot(cells, lo, hi, origin)
+            self.power *= 2
+            self.length = 0
+        return False
+
+    @staticmethod
+    def __snapshot(cells, lo: int, hi: int, origin: int) -> tuple:
+        """
+        tape contents with the blanks trimmed from
+        both ends, with their byte offset from position 0
+        """
+        data = cells[origin + lo:origin + hi + 1]
+        if isinstance(data, bytearray):
+            data, size = bytes(data), 1
+        else:
+            data, size = data.tobytes(), data.itemsize
+        trimmed = data.lstrip(b"\0")
+        return lo * size + len(data) - len(trimmed), trimmed.rstrip(b"\0")
+
+
+_batch_machine = None
+_batch_limits = None
+
+
+class TMProfile:
+    """
+    counters for a profiled TM run: hits per
+    (state, symbol) transition, the leftmost and
+    rightmost cells the head reached, the number of
+    times the head turned around, and the time spent
+    in each phase. Pass one to run() or advance();
+    without one the step loop is not instrumented
+    """
+
+    def __init__(self):
+        self.tm = None
+        self.hits = None
+        self.steps = 0
+        self.left = None
+        self.right = None
+        self.reversals = 0
+        # last non-stationary head delta, to count reversals across advance() calls
+        self.heading = 0
+        self.phases = dict()
+
+    def attach(self, tm: "TM") -> None:
+        """
+        sizes the counters for a compiled TM, keeping
+        them if already attached to it
+        :param tm: the TM being profiled
+        :return:
+        """
+        if self.tm is not tm or len(self.hits) != len(tm.c_table):
+            self.tm = tm
+            self.hits = [0] * len(tm.c_table)
+
+    def phase(self, name: str) -> "_Phase":
+        """
+        times a phase, with TMProfile.phase(name): ...
+        Time in phases of the same name adds up, and
+        phases may be nested
+        :param name: name of the phase
+        :return: a context manager timing the phase
+        """
+        return _Phase(self.phases, name)
+
+    def transitions(self) -> list:
+        """
+        the transitions taken, most taken first
+        :return: list of (hits, state, symbol, TMTransition)
+        """
+        if self.tm is None:
+            return list()
+        width = len(self.tm.symbol_list)
+        directions = {delta: direction for direction, delta in kDELTAS.items()}
+        rows = list()
+        for key, hits in enumerate(self.hits):
+            if hits:
+                state, symbol, delta = self.tm.c_table[key]
+                rows.append((hits, self.tm.state_list[key // width], self.tm.symbol_list[key % width],
+                             TMTransition(self.tm.state_list[state], self.tm.symbol_list[symbol],
+                                          directions[delta])))
+        rows.sort(key=lambda row: -row[0])
+        return rows
+
+    def as_dict(self) -> dict:
+        """
+        the profile as a dictionary for JSON output
+        :return: profile dictionary
+        """
+        states = collections.Counter()
+        transitions = list()
+        for hits, state, symbol, trans in self.transitions():
+            states[state] += hits
+            transitions.append({"state": state, "symbol": symbol, "next": trans.state,
+                                "write": trans.character, "move": trans.direction, "hits": hits})
+        return {"steps": self.steps, "transitions": transitions, "states": dict(states.most_common()),
+                "left": self.left, "right": self.right, "reversals": self.reversals,
+                "phases": self.phases}
+
+    def table(self) -> str:
+        """
+        the profile as a text table, most taken
+        transitions first
+        :return: table
+        """
+        lines = ["{0:>12} {1:>7}  {2}".format("hits", "share", "transition")]
+        for hits, state, symbol, trans in self.transitions():
+            lines.append("{0:>12} {1:>6.2f}%  {2}, {3} -> {4}, {5}, {6}".format(
+                hits, 100 * hits / max(self.steps, 1), state, symbol, *trans[:3]))
+        lines.append("steps: {0}, head reached cells {1} to {2}, reversals: {3}".format(
+            self.steps, self.left, self.right, self.reversals))
+        for name, seconds in sorted(self.phases.items(), key=lambda item: -item[1]):
+            lines.append("{0}: {1:.6f} s".format(name, seconds))
+        return "\n".join(lines)
+
+
+class _Phase:
+    """
+    times one phase of a profiled run into the
+    phase totals of its TMProfile
+    """
+
+    def __init__(self, phases: dict, name: str):
+        self.phases = phases
+        self.name = name
+        self.start = None
+
+    def __enter__(self) -> "_Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.phases[self.name] = self.phases.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class _Unprofiled:
+    """
+    stands in for a TMProfile when a run is not
+    profiled, timing nothing
+    """
+
+    def phase(self, name: str) -> "_Unprofiled":
+        return self
+
+    def __enter__(self) -> "_Unprofiled":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+def _batch_init(tm: TM, limits: dict) -> None:
+    global _batch_machine, _batch_limits
+    _batch_machine = tm
+    _batch_limits = limits
+
+
+def _batch_run(inputs: list, tm: TM = None, limits: dict = None) -> list:
+    if tm is not None:
+        _batch_init(tm, limits)
+    results = list()
+    for w in inputs:
+        try:
+            _batch_machine.load(TMTape(w))
+        except InvalidCharacterInTape:
+            results.append(TMResult(kVERDICT_INVALID, 0, None, 0, w))
+            continue
+        results.append(_batch_machine.run(**_batch_limits))
+    return results
+
+
+def _chunks(items: Iterable, size: int) -> "Iterator[list]":
+    chunk = list()
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
+class TMResult:
+    """
+    outcome of a TM execution: the verdict, the
+    number of steps taken and the final state, head
+    position and tape, plus the trace if one was kept
+    """
+
+    def __init__(self, verdict: str, steps: int, state: str, position: int, tape: str, trace: list = None):
+        self.verdict = verdict
+        self.steps = steps
+        self.state = state
+        self.position = position
+        self.tape = tape
+        self.trace = trace
+
+    @property
+    def accepted(self) -> bool:
+        return self.verdict == kVERDICT_ACCEPTED
+
+    def __str__(self) -> str:
+        return "{0}: {1}".format(self.verdict, self.tape.replace(kBLANK, " "))
+
+    def as_dict(self) -> dict:
+        """
+        the result as a dictionary for JSON output
+        :return: result dictionary
+        """
+        ret = {"verdict": self.verdict, "steps": self.steps, "state": self.state,
+               "position": self.position, "tape": self.tape}
+        if self.trace is not None:
+            ret["trace"] = self.trace
+        return ret
+
+
+class NTM(TM):
+    """
+    Nondeterministic Turing Machine. D-Table entries
+    may list several transitions, and run() searches
+    the configurations breadth first for one in an
+    accepting state
+    """
+    nondeterministic = True
+
+    def step(self) -> str:
+        raise AttributeError("step disabled for NTM")
+
+    def advance(self, *args, **kwargs) -> bool:
+        raise AttributeError("advance disabled for NTM")
+
+    def run_macro(self, *args, **kwargs) -> "TMResult":
+        raise AttributeError("run_macro disabled for NTM")
+
+    def run_lockstep(self, *args, **kwargs) -> list:
+        raise AttributeError("run_lockstep disabled for NTM")
+
+    def exec(self) -> list:
+        """
+        runs the NTM and returns the witness path as
+        a trace, followed by the verdict
+        :return: trace list
+        """
+        result = self.run(kTRACE_FULL)
+        return (result.trace or [self.get_c()]) + [str(result)]
+
+    def iexec(self, max_steps: int = None, window: int = None) -> "Iterator[str]":
+        result = self.run(kTRACE_FULL, max_steps=max_steps, window=window)
+        yield from (result.trace or [ConfigRenderer(self, window).render()]) + [str(result)]
+
+    def run(self, trace: int = kTRACE_NONE, max_steps: int = None,
+            max_configs: int = kNTM_MAX_CONFIGS, window: int = None,
+            timeout: float = None) -> "TMResult":
+        """
+        searches the configurations of the NTM breadth
+        first, skipping configurations already seen.
+        The machine accepts if any branch enters an
+        accepting state. If none does, the search ends
+        when no branch has a step left to take: if any
+        branch halted it is rejected (halted without
+        accepting states) and the witness is the first
+        branch to halt, the others having come back to
+        configurations already seen. If every branch
+        did, the verdict is Looping. A search stopped by
+        a limit while a branch can still step is
+        Exhausted. Afterwards the machine and the loaded tape
+        are left in the witness's final configuration,
+        and the witness path is the result's trace
+        :param trace: kTRACE_FULL to keep the witness path
+        :param max_steps: maximum search depth
+        :param max_configs: maximum number of configurations to keep
+        :param window: only render this many cells either side of the head in the trace
+        :param timeout: maximum wall-clock time in seconds
+        :return: the result of the search
+        """
+        self.reset()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        table = self.c_table
+        accepting = self.c_accept
+        width = len(self.symbol_list)
+        tape = self.loaded_tape
+        # configurations are (state, head, offset, cells) with the
+        # blanks trimmed from both ends of cells
+        start = (self.state_index[self.start], 0) + \
+            self.__trim(tape.lo, tuple(self.symbol_index[tape.read(p)] for p in range(tape.lo, tape.hi + 1)))
+        parents = {start: None}
+        frontier = [start]
+        depth = 0
+        found = start if accepting[start[0]] else None
+        halted = None
+        while frontier and found is None:
+            # at the depth limit the branches are only checked for halting
+            limited = max_steps is not None and depth >= max_steps
+            next_frontier = list()
+            for configuration in frontier:
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                state, pos, offset, cells = configuration
+                symbol = cells[pos - offset] if 0 <= pos - offset < len(cells) else 0
+                transitions = table[state * width + symbol]
+                if transitions is None:
+                    if halted is None:
+                        halted = configuration
+                    continue
+                if limited:
+                    # a branch with a step left to take
+                    next_frontier.append(configuration)
+                    continue
+                for choice, (next_state, write, delta) in enumerate(transitions):
+                    child = (next_state, pos + delta) + self.__write(offset, cells, pos, write)
+                    if child in parents:
+                        continue
+                    parents[child] = (configuration, choice)
+                    if accepting[next_state]:
+                        found = child
+                        break
+                    next_frontier.append(child)
+                if found is not None:
+                    break
+                if len(parents) > max_configs:
+                    break
+            if len(parents) > max_configs or (deadline is not None and time.monotonic() > deadline):
+                break
+            frontier = next_frontier
+            if limited:
+                break
+            depth += 1
+
+        witness = found if found is not None else halted if not frontier else None
+        if witness is None:
+            # an empty frontier means every branch came back to a seen configuration
+            return self.result(verdict=kVERDICT_EXHAUSTED if frontier else kVERDICT_LOOPING)
+        # replay the witness branch on the tape
+        choices = list()
+        while parents[witness] is not None:
+            witness, choice = parents[witness]
+            choices.append(choice)
+        renderer = ConfigRenderer(self, window)
+        configs = [renderer.render()]
+        for choice in reversed(choices):
+            symbol = self.symbol_index[tape.read(self.current_position)]
+            next_state, write, delta = table[self.state_index[self.current_state] * width + symbol][choice]
+            tape.write(self.symbol_list[write], self.current_position)
+            self.current_state = self.state_list[next_state]
+            self.current_position += delta
+            self.steps += 1
+            if trace != kTRACE_NONE:
+                configs.append("⊢{0}".format(renderer.render()))
+        return self.result(configs if trace != kTRACE_NONE else None)
+
+    @staticmethod
+    def __trim(offset: int, cells: tuple) -> tuple:
+        start = 0
+        while start < len(cells) and cells[start] == 0:
+            start += 1
+        end = len(cells)
+        while end > start and cells[end - 1] == 0:
+            end -= 1
+        return offset + start, cells[start:end]
+
+    @classmethod
+    def __write(cls, offset: int, cells: tuple, position: int, symbol: int) -> tuple:
+        index = position - offset
+        if 0 <= index < len(cells):
+            if cells[index] == symbol:
+                return offset, cells
+            return cls.__trim(offset, cells[:index] + (symbol,) + cells[index + 1:])
+        if symbol == 0:
+            return offset, cells
+        if not cells:
+            return position, (symbol,)
+        if index < 0:
+            return position, (symbol,) + (0,) * (-index - 1) + cells
+        return offset, cells + (0,) * (index - len(cells)) + (symbol,)
+
+
+class MTM(TM):
+    """
+    Multi-tape Turing Machine. The config's "Tapes"
+    entry gives the number of tapes k, and every
+    D-Table key and transition carries one character
+    and direction per tape, e.g. "a, Б" mapping to
+    "q1, (a, a), (→, →)". Each tape has its own head;
+    the first tape holds the input and the verdict
+    """
+    multitape = True
+
+    def __init__(self, filepath=None):
+        self.current_positions = [0]
+        self.loaded_tapes = list()
+        super().__init__(filepath)
+
+    @property
+    def current_position(self) -> int:
+        return self.current_positions[0]
+
+    @current_position.setter
+    def current_position(self, position: int) -> None:
+        self.current_positions[0] = position
+
+    def load(self, tape: "Tape", *tapes: "Tape") -> None:
+        """
+        loads the tapes into the machine. Tapes that
+        are not given start out blank
+        :param tape: tape containing string to be processed
+        :param tapes: contents of the other tapes
+        :return:
+        """
+        tapes = (tape,) + tapes
+        if len(tapes) > self.tapes:
+            raise ValueError("too many tapes", len(tapes))
+        for this_tape in tapes:
+            super().load(this_tape)
+        self.loaded_tapes = list(tapes) + [type(tape)("") for _ in range(self.tapes - len(tapes))]
+        self.loaded_tape = tape
+
+    def compile(self) -> None:
+        """
+        compiles the d-table into an integer coded
+        form. The characters under the k heads are
+        read as one k digit number in base |tapealpha|,
+        so each entry is at state * |tapealpha|^k +
+        sum(symbol_i * |tapealpha|^i) and is either
+        None or a tuple of (next state, symbols to
+        write, head deltas)
+        :return:
+        """
+        self.state_list = sorted(self.states)
+        self.state_index = {state: i for i, state in enumerate(self.state_list)}
+        self.symbol_list = [kBLANK] + sorted(self.tapealpha.difference({kBLANK}))
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbol_list)}
+        self.c_table = [None] * (len(self.state_list) * self.c_stride)
+        for state in self.d_table.keys():
+            for char in self.d_table[state].keys():
+                chars = (char,) if isinstance(char, str) else char
+                if state not in self.state_index or not all(x in self.symbol_index for x in chars):
+                    # can never be reached, nothing to compile
+                    continue
+                trans = self.d_table[state][char]
+                writes = (trans.character,) if isinstance(trans.character, str) else trans.character
+                moves = (trans.delta,) if isinstance(trans.delta, int) else trans.delta
+                key = self.state_index[state] * self.c_stride + \
+                    sum(self.symbol_index[x] * w for x, w in zip(chars, self.c_weights))
+                self.c_table[key] = (self.state_index[trans.state],
+                                     tuple(self.symbol_index[x] for x in writes), moves)
+        self.c_accept = [state in self.accept for state in self.state_list]
+        self.macro_cache = dict()
+
+    @property
+    def c_weights(self) -> tuple:
+        # place value of each tape's symbol in a compiled table slot
+        return tuple(len(self.symbol_list) ** i for i in range(self.tapes))
+
+    @property
+    def c_stride(self) -> int:
+        # compiled table slots per state
+        return len(self.symbol_list) ** self.tapes
+
+    def __read(self):
+        """
+        the characters under the heads, in the form
+        used as a d-table key
+        """
+        chars = tuple(tape.read(pos) for tape, pos in zip(self.loaded_tapes, self.current_positions))
+        return chars if self.tapes > 1 else chars[0]
+
+    def __get_t(self) -> TMTransition:
+        try:
+            return self.d_table[self.current_state][self.__read()]
+        except KeyError:
+            raise TMTransitionUndefined(self.current_state, self.__read())
+
+    def get_c(self) -> str:
+        """
+        generates a configuration string for the
+        current state of the machine: the configuration
+        of every tape, with the current state at the
+        position of that tape's head
+        :return: the configuration string
+        """
+        configs = list()
+        for tape, pos in zip(self.loaded_tapes, self.current_positions):
+            contents = str(tape)
+            configs.append("{0}{1}{2}".format(contents[:pos], self.current_state, contents[pos:]))
+        return kTAPE_SEPARATOR.join(configs)
+
+    def step(self) -> str:
+        """
+        performs a single step of the TM's execution
+        returns a string detailing the resulting
+        configuration
+        :return: configuration string
+        """
+        self.__apply()
+        ret_val = "⊢{0}".format(self.get_c())
+        return ret_val
+
+    def __apply(self) -> None:
+        trans = self.__get_t()
+        self.current_state = trans.state
+        writes = (trans.character,) if isinstance(trans.character, str) else trans.character
+        moves = (trans.delta,) if isinstance(trans.delta, int) else trans.delta
+        for i, tape in enumerate(self.loaded_tapes):
+            tape.write(writes[i], self.current_positions[i])
+            self.current_positions[i] += moves[i]
+        self.steps += 1
+
+    def iexec(self, max_steps: int = None, window: int = None) -> "Iterator[str]":
+        self.reset()
+        verdict = None
+        renderer = ConfigRenderer(self, window)
+        # initial config
+        yield renderer.render()
+        while True:
+            try:
+                if max_steps is not None and self.steps >= max_steps:
+                    # only exhausted if there is a step left to take
+                    self.__get_t()
+                    verdict = kVERDICT_EXHAUSTED
+                    break
+                self.__apply()
+                yield "⊢{0}".format(renderer.render())
+                if self.is_accepted():
+                    break
+            except TMTransitionUndefined:
+                break
+        yield str(self.result(verdict=verdict))
+
+    def __align_tapes(self) -> list:
+        """
+        makes sure the loaded tapes use the same
+        symbol codes as the compiled d-table
+        :return: the loaded tapes
+        """
+        for tape in self.loaded_tapes:
+            if tape.symbols[:len(self.symbol_list)] != self.symbol_list:
+                tape.recode(self.symbol_list)
+        return self.loaded_tapes
+
+    def advance(self, budget: int = sys.maxsize, max_cells: int = sys.maxsize,
+                detector: "LoopDetector" = None, profile: "TMProfile" = None) -> bool:
+        """
+        continues the execution of the TM from its
+        current configuration using the compiled
+        d-table, for at most budget steps
+        :param budget: maximum number of steps to take
+        :param max_cells: maximum number of cells any tape may span
+        :param detector: not supported, loop detection needs a single tape
+        :param profile: not supported, profiles count single tape transitions
+        :return: True if the machine halted
+        """
+        if detector is not None:
+            raise TypeError("loop detection needs a single tape")
+        if profile is not None:
+            raise TypeError("profiles count single tape transitions")
+        if not all(isinstance(tape, TMTape) for tape in self.loaded_tapes):
+            return self.__advance_any(budget, max_cells)
+        table = self.c_table
+        accepting = self.c_accept
+        stride = self.c_stride
+        weights = self.c_weights
+        tapes = self.__align_tapes()
+        heads = range(len(tapes))
+        cells = [tape.cells for tape in tapes]
+        origins = [tape.origin for tape in tapes]
+        # as in TM.advance, positions and extents are indices into cells
+        lo = [tape.origin + tape.lo for tape in tapes]
+        hi = [tape.origin + tape.hi for tape in tapes]
+        pos = [origin + position for origin, position in zip(origins, self.current_positions)]
+        state = self.state_index[self.current_state]
+        steps = 0
+        halted = False
+        exceeded = False
+        while True:
+            key = state * stride
+            for i in heads:
+                key += cells[i][pos[i]] * weights[i]
+            trans = table[key]
+            if trans is None:
+                halted = True
+                break
+            if steps >= budget:
+                break
+            # every head is checked before any extent grows, so a step over
+            # the limit leaves the tapes as they were
+            for i in heads:
+                if (pos[i] < lo[i] and hi[i] - pos[i] >= max_cells) or \
+                        (pos[i] > hi[i] and pos[i] - lo[i] >= max_cells):
+                    exceeded = True
+            if exceeded:
+                break
+            for i in heads:
+                if pos[i] < lo[i]:
+                    lo[i] = pos[i]
+                elif pos[i] > hi[i]:
+                    hi[i] = pos[i]
+            state, writes, deltas = trans
+            for i in heads:
+                cells[i][pos[i]] = writes[i]
+                pos[i] += deltas[i]
+                if not 0 <= pos[i] < len(cells[i]):
+                    tapes[i].reserve(pos[i] - origins[i])
+                    shift = tapes[i].origin - origins[i]
+                    origins[i] += shift
+                    pos[i] += shift
+                    lo[i] += shift
+                    hi[i] += shift
+            steps += 1
+            if accepting[state]:
+                halted = True
+                break
+        for i in heads:
+            tapes[i].lo = lo[i] - origins[i]
+            tapes[i].hi = hi[i] - origins[i]
+        self.current_state = self.state_list[state]
+        self.current_positions = [p - origin for p, origin in zip(pos, origins)]
+        self.steps += steps
+        if exceeded:
+            raise TMLimitExceeded("tape cells", max_cells)
+        return halted
+
+    def __advance_any(self, budget: int, max_cells: int) -> bool:
+        """
+        the advance() loop for tapes other than
+        TMTape, going through their read() and write()
+        """
+        table = self.c_table
+        accepting = self.c_accept
+        stride = self.c_stride
+        weights = self.c_weights
+        symbols = self.symbol_list
+        index = self.symbol_index
+        tapes = self.loaded_tapes
+        heads = range(len(tapes))
+        pos = list(self.current_positions)
+        state = self.state_index[self.current_state]
+        steps = 0
+        halted = False
+        exceeded = False
+        while True:
+            trans = table[state * stride + sum(index[tapes[i].read(pos[i])] * weights[i] for i in heads)]
+            if trans is None:
+                halted = True
+                break
+            if steps >= budget:
+                break
+            if any((pos[i] < tapes[i].lo and tapes[i].hi - pos[i] >= max_cells) or
+                   (pos[i] > tapes[i].hi and pos[i] - tapes[i].lo >= max_cells) for i in heads):
+                exceeded = True
+                break
+            state, writes, deltas = trans
+            for i in heads:
+                tapes[i].write(symbols[writes[i]], pos[i])
+                pos[i] += deltas[i]
+            steps += 1
+            if accepting[state]:
+                halted = True
+                break
+        self.current_state = self.state_list[state]
+        self.current_positions = pos
+        self.steps += steps
+        if exceeded:
+            raise TMLimitExceeded("tape cells", max_cells)
+        return halted
+
+    def run_macro(self, *args, **kwargs) -> "TMResult":
+        raise AttributeError("run_macro disabled for MTM")
+
+    def run_lockstep(self, *args, **kwargs) -> list:
+        raise AttributeError("run_lockstep disabled for MTM")
+
+    def reset(self) -> None:
+        self.current_state = self.start
+        self.current_positions = [0] * self.tapes
+        self.steps = 0
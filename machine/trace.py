@@ -0,0 +1,239 @@
+import json
+import mmap
+import array
+from .constants import *
+from .tape import TMTape
+from .tm import TMResult, ConfigRenderer
+
+
+class TraceWriter:
+    """
+    writes the trace of a TM run to a file. The file
+    is the magic number and a JSON header naming the
+    states and symbols, then one block per keyframe:
+    the full configuration of the machine followed by
+    every step after it as one packed integer,
+    (next state * |symbols| + symbol written) * 3 +
+    head delta + 1. An end record holds the verdict.
+    Blocks are written as they are finished, so at
+    most one keyframe's worth of steps is in memory
+    """
+
+    def __init__(self, filepath: str, tm: "TM"):
+        self.tm = tm
+        self.file = open(filepath, "wb")
+        packed = len(tm.state_list) * len(tm.symbol_list) * 3
+        self.typecode = "H" if packed <= 1 << 16 else "I" if packed <= 1 << 32 else "Q"
+        self.__write(kTRACE_MAGIC, {"states": tm.state_list, "symbols": tm.symbol_list,
+                                    "typecode": self.typecode})
+        self.block = None
+        self.records = None
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.file.close()
+
+    def __write(self, kind: bytes, header: dict, *payload: bytes) -> None:
+        header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        self.file.write(kind + len(header).to_bytes(4, "little") + header)
+        for data in payload:
+            self.file.write(data)
+
+    def __flush(self) -> None:
+        if self.block is not None:
+            self.block["records"] = len(self.records)
+            cells = self.block.pop("cells")
+            self.__write(b"K", self.block, cells, self.records.tobytes())
+        self.block = None
+
+    def keyframe(self) -> array.array:
+        """
+        ends the current block and starts a new one
+        with the machine's current configuration
+        :return: the array to append the block's steps to
+        """
+        self.__flush()
+        tape = self.tm.loaded_tape
+        written = tape.cells[tape.origin + tape.lo:tape.origin + tape.hi + 1]
+        self.block = {"steps": self.tm.steps, "state": self.tm.current_state,
+                      "position": self.tm.current_position, "lo": tape.lo, "hi": tape.hi,
+                      "tape_symbols": tape.symbols, "wide": not isinstance(written, bytearray),
+                      "cells": bytes(written) if isinstance(written, bytearray) else written.tobytes()}
+        self.records = array.array(self.typecode)
+        return self.records
+
+    def finish(self, result: TMResult) -> None:
+        """
+        writes the last block and the end record
+        :param result: the result of the run
+        :return:
+        """
+        self.__flush()
+        self.__write(b"E", {"verdict": result.verdict, "steps": result.steps})
+
+
+class TraceReader:
+    """
+    reads a trace written by TraceWriter. The file
+    is mapped into memory and only the block headers
+    are read up front, so seeking to a step replays
+    at most one keyframe's worth of steps. Steps are
+    rendered in the same format as exec()
+    """
+
+    def __init__(self, filepath: str):
+        self.file = open(filepath, "rb")
+        self.image = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.image[:len(kTRACE_MAGIC)] != kTRACE_MAGIC:
+            self.close()
+            raise ValueError("not a trace", filepath)
+        header, at = self.__read(len(kTRACE_MAGIC))
+        self.state_list = header["states"]
+        self.symbol_list = header["symbols"]
+        self.typecode = header["typecode"]
+        self.itemsize = array.array(self.typecode).itemsize
+        # (keyframe, offset of its cells, offset of its records) for every block
+        self.blocks = list()
+        self.verdict = None
+        self.total = None
+        while at < len(self.image):
+            kind = self.image[at:at + 1]
+            header, at = self.__read(at + 1)
+            if kind == b"E":
+                self.verdict = header["verdict"]
+                self.total = header["steps"]
+                break
+            cells = at
+            at += (header["hi"] - header["lo"] + 1) * (2 if header["wide"] else 1)
+            self.blocks.append((header, cells, at))
+            at += header["records"] * self.itemsize
+        if self.total is None:
+            # an unfinished trace ends after its last recorded step
+            last = self.blocks[-1][0] if self.blocks else {"steps": 0, "records": 0}
+            self.total = last["steps"] + last["records"]
+        self.multitape = False
+        self.loaded_tape = None
+        self.current_state = None
+        self.current_position = 0
+        self.steps = 0
+        self.__block = None
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.image.close()
+        self.file.close()
+
+    def __read(self, at: int) -> tuple:
+        size = int.from_bytes(self.image[at:at + 4], "little")
+        return json.loads(self.image[at + 4:at + 4 + size].decode("utf-8")), at + 4 + size
+
+    def seek(self, step: int) -> None:
+        """
+        moves the replay to the configuration after
+        a number of steps, starting from the nearest
+        keyframe before it
+        :param step: step to move to
+        :return:
+        """
+        if not 0 <= step <= self.total:
+            raise IndexError("step not in trace", step)
+        index = max(i for i, block in enumerate(self.blocks) if block[0]["steps"] <= step)
+        if not (self.__block == index and self.steps <= step):
+            keyframe, cells, _ = self.blocks[index]
+            count = keyframe["hi"] - keyframe["lo"] + 1
+            tape = TMTape("")
+            tape.symbols = keyframe["tape_symbols"]
+            tape.codes = {symbol: i for i, symbol in enumerate(tape.symbols)}
+            if keyframe["wide"]:
+                tape.cells = array.array("H")
+                tape.cells.frombytes(self.image[cells:cells + 2 * count])
+            else:
+                tape.cells = bytearray(self.image[cells:cells + count])
+            tape.origin = -keyframe["lo"]
+            tape.lo = keyframe["lo"]
+            tape.hi = keyframe["hi"]
+            tape.reserve(keyframe["position"])
+            self.loaded_tape = tape
+            self.current_state = keyframe["state"]
+            self.current_position = keyframe["position"]
+            self.steps = keyframe["steps"]
+            self.__block = index
+        for _ in self.__replay(step):
+            pass
+
+    def __replay(self, stop: int):
+        """
+        applies the recorded steps until the replay
+        reaches step stop, yielding after each one
+        """
+        width = len(self.symbol_list)
+        while self.steps < stop:
+            keyframe, _, at = self.blocks[self.__block]
+            first = self.steps - keyframe["steps"]
+            if first >= keyframe["records"]:
+                self.__block += 1
+                continue
+            last = min(keyframe["records"], stop - keyframe["steps"])
+            records = memoryview(self.image)[at + first * self.itemsize:at + last * self.itemsize]
+            try:
+                for code in records.cast(self.typecode):
+                    code, move = divmod(code, 3)
+                    state, symbol = divmod(code, width)
+                    self.loaded_tape.write(self.symbol_list[symbol], self.current_position)
+                    self.current_position += move - 1
+                    self.current_state = self.state_list[state]
+                    self.steps += 1
+                    yield
+            finally:
+                records.release()
+
+    def config(self, step: int) -> str:
+        """
+        :param step: step of the trace
+        :return: the configuration after that step
+        """
+        self.seek(step)
+        return "{0}{1}".format("⊢" if step else "", ConfigRenderer(self).render())
+
+    def configs(self, start: int = 0, stop: int = None, window: int = None) -> "Iterator[str]":
+        """
+        renders a range of steps as exec() does
+        :param start: first step
+        :param stop: step after the last one, the end of the trace by default
+        :param window: only render this many cells either side of the head
+        :return: iterator over the configurations
+        """
+        stop = self.total + 1 if stop is None else min(stop, self.total + 1)
+        if start >= stop:
+            return
+        self.seek(start)
+        renderer = ConfigRenderer(self, window)
+        yield "{0}{1}".format("⊢" if start else "", renderer.render())
+        for _ in self.__replay(stop - 1):
+            yield "⊢{0}".format(renderer.render())
+
+    def result(self) -> TMResult:
+        """
+        :return: the result of the traced run
+        """
+        self.seek(self.total)
+        return TMResult(self.verdict, self.steps, self.current_state, self.current_position,
+                        str(self.loaded_tape))
+
+    def replay(self, window: int = None) -> "Iterator[str]":
+        """
+        the whole trace followed by the verdict, as
+        iexec() yields it
+        :param window: only render this many cells either side of the head
+        :return: iterator over the trace
+        """
+        yield from self.configs(window=window)
+        if self.verdict is not None:
+            yield str(self.result())
@@ -16,7 +16,7 @@ if __name__ == "__main__":
             mytape = machine.TMTape(valuelist)
             try:
                 tm.load(mytape)
-                for config in tm.exec():
+                for config in tm.iexec():
                     print(config)
                     if 'Rejected:' in config:
                         print("The input: " + value + " entered did NOT the final state. The final state:")
@@ -0,0 +1,56 @@
+import os
+import sys
+import asyncio
+import machine
+
+kTOK_SOCKET = "-u"
+kTOK_HOST = "-a"
+kTOK_PORT = "-p"
+kTOK_WORKERS = "-w"
+kTOK_LOAD = "-l"
+kTOK_SLICE = "-s"
+kTOK_OFFLOAD = "-o"
+
+async def main(server: machine.MachineServer, host: str, port: int, socket: str, preload: list) -> None:
+    for filepath in preload:
+        server.machine(filepath)
+    await server.start(host, port, socket)
+    print("serving on {0}".format(socket or "{0}:{1}".format(host, port)), file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+if __name__ == "__main__":
+    host = machine.kSERVER_HOST
+    port = machine.kSERVER_PORT
+    socket = None
+    workers = None
+    preload = list()
+    slice_steps = machine.kSERVER_SLICE
+    offload_steps = machine.kSERVER_OFFLOAD_STEPS
+    #parse command line
+    for i in range(len(sys.argv)):
+        if sys.argv[i] == kTOK_SOCKET:
+            socket = os.path.expanduser(sys.argv[i+1])
+        if sys.argv[i] == kTOK_HOST:
+            host = sys.argv[i+1]
+        if sys.argv[i] == kTOK_PORT:
+            port = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_WORKERS:
+            workers = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_LOAD:
+            preload.append(os.path.expanduser(sys.argv[i+1]))
+        if sys.argv[i] == kTOK_SLICE:
+            slice_steps = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_OFFLOAD:
+            offload_steps = int(sys.argv[i+1])
+    server = machine.MachineServer(workers, slice_steps, offload_steps)
+    try:
+        if sys.version_info >= (3, 7):
+            asyncio.run(main(server, host, port, socket, preload))
+        else:
+            asyncio.get_event_loop().run_until_complete(main(server, host, port, socket, preload))
+    except KeyboardInterrupt:
+        pass
+    exit(0)
@@ -1,10 +1,32 @@
 import os
 import machine
 import sys
+import json
+import collections
+from collections.abc import Iterator
 
 kTOK_TM = "-t"
 kTOK_INPUT = "-i"
 kTOK_DUMP = "-d"
+kTOK_MAX_STEPS = "-m"
+kTOK_BATCH = "-b"
+kTOK_WORKERS = "-w"
+kTOK_NONDETERMINISTIC = "-n"
+kTOK_MULTITAPE = "-k"
+kTOK_CHECKPOINT = "-c"
+kTOK_CHECKPOINT_STEPS = "-e"
+kTOK_CHECKPOINT_SECONDS = "-s"
+kTOK_RESUME = "-r"
+kTOK_WINDOW = "-v"
+kTOK_TRACE = "-o"
+kTOK_PROFILE = "-p"
+kPROFILE_JSON = "json"
+kCMD_REPLAY = "replay"
+# flags a kind of machine can't run with: NTM searches have no single
+# run to snapshot, trace or profile, and traces and profiles are single tape
+kUNSUPPORTED = {kTOK_NONDETERMINISTIC: [kTOK_CHECKPOINT, kTOK_RESUME, kTOK_TRACE, kTOK_PROFILE],
+                kTOK_MULTITAPE: [kTOK_TRACE, kTOK_PROFILE]}
+kSTDIN = "-"
 kUNIXSEP = "/"
 kWINSEP = "\\"
 kMACSEP = ":"
@@ -19,11 +41,71 @@ def pathfix(rawpath: str)->os.path:
     first = parts.pop(0)
     return os.path.join(os.path.expanduser(first), *parts)
 
+def read_inputs(f) -> "Iterator[str]":
+    """
+    reads batch inputs, one per line. Lines that
+    are JSON objects use their "input" field and
+    JSON strings are decoded, anything else is
+    taken as is
+    """
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line.startswith("{"):
+            yield json.loads(line)["input"]
+        elif line.startswith('"'):
+            yield json.loads(line)
+        else:
+            yield line
+
+def run_batch(M: machine.TM, f, workers: int, max_steps: int) -> None:
+    inputs = collections.deque()
+    def remember(items):
+        # keep the inputs to pair with their results, which come back in order
+        for item in items:
+            inputs.append(item)
+            yield item
+    for result in M.run_batch(remember(read_inputs(f)), workers, max_steps=max_steps):
+        line = {"input": inputs.popleft()}
+        line.update(result.as_dict())
+        print(json.dumps(line, ensure_ascii=False))
+
+def replay(args: list, window: int) -> None:
+    """
+    prints a trace written with -o: all of it with
+    the verdict, the configuration after one step,
+    or an inclusive range of steps
+    """
+    #the steps come straight after the file, before any flags such as -v
+    steps = list()
+    for arg in args[1:3]:
+        if arg.startswith("-"):
+            break
+        steps.append(int(arg))
+    with machine.TraceReader(pathfix(args[0])) as R:
+        if not steps:
+            for item in R.replay(window):
+                print(item)
+        else:
+            for item in R.configs(steps[0], steps[-1] + 1, window):
+                print(item)
+
 if __name__ == "__main__":
     filepath = None
     w = None
     dump = False
     execute = False
+    max_steps = None
+    batch = None
+    workers = None
+    nondeterministic = False
+    multitape = False
+    checkpoint = None
+    checkpoint_steps = None
+    checkpoint_seconds = None
+    resume = None
+    window = None
+    trace = None
+    profile = None
     #parse command line
     for i in range(len(sys.argv)):
         if sys.argv[i] == kTOK_TM:
@@ -33,15 +115,86 @@ if __name__ == "__main__":
             execute = True
         if sys.argv[i] == kTOK_DUMP:
             dump = True
-    #load a machine
-    M = machine.TM(filepath)
+        if sys.argv[i] == kTOK_MAX_STEPS:
+            max_steps = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_BATCH:
+            batch = sys.argv[i+1]
+        if sys.argv[i] == kTOK_WORKERS:
+            workers = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_NONDETERMINISTIC:
+            nondeterministic = True
+        if sys.argv[i] == kTOK_MULTITAPE:
+            multitape = True
+        if sys.argv[i] == kTOK_CHECKPOINT:
+            checkpoint = pathfix(sys.argv[i+1])
+        if sys.argv[i] == kTOK_CHECKPOINT_STEPS:
+            checkpoint_steps = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_CHECKPOINT_SECONDS:
+            checkpoint_seconds = float(sys.argv[i+1])
+        if sys.argv[i] == kTOK_RESUME:
+            resume = pathfix(sys.argv[i+1])
+        if sys.argv[i] == kTOK_WINDOW:
+            window = int(sys.argv[i+1])
+        if sys.argv[i] == kTOK_TRACE:
+            trace = pathfix(sys.argv[i+1])
+        if sys.argv[i] == kTOK_PROFILE:
+            profile = sys.argv[i+1]
+    #reject flag combinations the machine can't run
+    given = {kTOK_NONDETERMINISTIC: nondeterministic, kTOK_MULTITAPE: multitape, kTOK_CHECKPOINT: checkpoint,
+             kTOK_RESUME: resume, kTOK_TRACE: trace, kTOK_PROFILE: profile}
+    for kind, flags in kUNSUPPORTED.items():
+        for flag in flags:
+            if given[kind] and given[flag]:
+                print("{0} can't be combined with {1}".format(flag, kind), file=sys.stderr)
+                exit(2)
+    #replay a recorded trace
+    if len(sys.argv) > 2 and sys.argv[1] == kCMD_REPLAY:
+        replay(sys.argv[2:], window)
+        exit(0)
+    #load a machine, timing it for -p
+    P = machine.TMProfile()
+    with P.phase("config"):
+        if nondeterministic:
+            M = machine.NTM(filepath)
+        elif multitape:
+            M = machine.MTM(filepath)
+        else:
+            M = machine.TM(filepath)
+    #a checkpointed run prints only its result, resumed runs carry on checkpointing
+    if resume and checkpoint is None:
+        checkpoint = resume
+    if resume or (execute and checkpoint):
+        if resume:
+            M.restore(resume)
+        else:
+            M.load(machine.TMTape(w))
+        result = M.run(max_steps=max_steps, resume=bool(resume), checkpoint=checkpoint,
+                       checkpoint_steps=checkpoint_steps, checkpoint_seconds=checkpoint_seconds)
+        print(result)
+    #profile the run, printing the verdict and the profile
+    elif execute and profile:
+        M.load(machine.TMTape(w))
+        print(M.run(max_steps=max_steps, profile=P))
+        if profile == kPROFILE_JSON:
+            print(json.dumps(P.as_dict(), ensure_ascii=False))
+        else:
+            print(P.table())
+    #record the trace to a file, printing only the verdict
+    elif execute and trace:
+        M.load(machine.TMTape(w))
+        print(M.record(trace, max_steps=max_steps))
     #if there's input output the trace
-    if execute:
+    elif execute:
         T = machine.TMTape(w)
         M.load(T)
-        trace = M.exec()
-        for item in trace:
+        for item in M.iexec(max_steps, window):
             print(item)
+    #run every input in the batch file
+    if batch == kSTDIN:
+        run_batch(M, sys.stdin, workers, max_steps)
+    elif batch:
+        with open(pathfix(batch), encoding="utf-8") as f:
+            run_batch(M, f, workers, max_steps)
     #if a dump of the config is requested output that
     if dump:
         print(M.dumps())